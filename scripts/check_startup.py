@@ -0,0 +1,80 @@
+"""
+Проверка времени запуска точки входа `project`.
+
+Запускает `python -X importtime -c "import src.primitive_db.main"` несколько
+раз, берет лучшее суммарное время импорта и сравнивает его с бюджетом.
+Дополнительно проверяет, что тяжелые модули не импортируются при запуске.
+
+Использование: python scripts/check_startup.py  (или make bench-startup)
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+ENTRY_MODULE = "src.primitive_db.main"
+RUNS = 5
+IMPORT_TIME_BUDGET_MS = 60
+# Модули, которые должны импортироваться только при первом использовании
+DEFERRED_MODULES = (
+    "prettytable",
+    "concurrent.futures",
+    "multiprocessing",
+    "gzip",
+    "lzma",
+    "zstandard",
+    "shlex",
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _measure() -> tuple:
+    """Возвращает (суммарное время импорта в мкс, список импортированных модулей)."""
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {ENTRY_MODULE}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+
+    total_us = None
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        modules.append(name)
+        if name == ENTRY_MODULE:
+            total_us = int(cumulative)
+
+    return total_us, modules
+
+
+def main() -> int:
+    """Запускает проверку и возвращает код выхода."""
+
+    timings = []
+    modules = []
+    for _ in range(RUNS):
+        total_us, modules = _measure()
+        timings.append(total_us)
+
+    best_ms = min(timings) / 1000
+    print(f"Импорт {ENTRY_MODULE}: {best_ms:.1f} мс "
+          f"(лучший из {RUNS}, бюджет {IMPORT_TIME_BUDGET_MS} мс)")
+
+    eager = [name for name in DEFERRED_MODULES if name in modules]
+    if eager:
+        print(f"Ошибка: при запуске импортируются модули: {', '.join(eager)}")
+        return 1
+
+    if best_ms > IMPORT_TIME_BUDGET_MS:
+        print("Ошибка: превышен бюджет времени запуска")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,8 @@ import json
 import time
 from functools import wraps
 
+from .primitive_db.command_log import log_event, sample_command
+
 
 def handle_db_errors(func):
     """
@@ -55,7 +57,8 @@ def confirm_action(action_name):
 
 def log_time(func):
     """
-    Декоратор, который замеряет время выполнения функции и выводит его в консоль.
+    Декоратор, который замеряет время выполнения функции и записывает его
+    в журнал команд (в фоновом потоке, без вывода в консоль).
     """
 
     @wraps(func)
@@ -64,13 +67,47 @@ def log_time(func):
         result = func(*args, **kwargs)
         end_time = time.monotonic()
         
-        execution_time = end_time - start_time
-        print(f'Функция {func.__name__} выполнилась за {execution_time:.6f} сек.')
+        log_event({
+            "event": "timing",
+            "function": func.__name__,
+            "duration_ms": round((end_time - start_time) * 1000, 3),
+        })
         
         return result
     
     return wrapper
 
+def log_command(func):
+    """
+    Декоратор для выполнения команды: записывает в журнал команд имя
+    команды, таблицу, длительность и результат (успех или исключение).
+    Решение о выборке принимается до выполнения и действует на все
+    события команды (см. sample_command).
+
+    Первым аргументом функции должна быть разобранная команда (Statement).
+    """
+
+    @wraps(func)
+    def wrapper(statement, *args, **kwargs):
+        sample_command()
+        start_time = time.monotonic()
+        error = None
+        try:
+            return func(statement, *args, **kwargs)
+        except Exception as e:
+            error = repr(e)
+            raise
+        finally:
+            log_event({
+                "event": "command",
+                "command": statement.command,
+                "table": statement.table,
+                "duration_ms": round((time.monotonic() - start_time) * 1000, 3),
+                "error": error,
+            })
+    
+    return wrapper
+
 def create_cacher():
     """Создает замыкание с кэшем и возвращает функцию для работы с ним."""
 
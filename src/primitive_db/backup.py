@@ -0,0 +1,281 @@
+import json
+import os
+from pathlib import Path
+
+from .constants import (
+    BACKUP_CHUNK_SIZE,
+    BACKUP_HASH_ALGORITHM,
+    BACKUP_INDEX_FILE,
+    BACKUP_OBJECTS_DIRECTORY,
+    BACKUP_SNAPSHOT_NAME_FORMAT,
+    BACKUP_SNAPSHOTS_DIRECTORY,
+    DATA_DIRECTORY,
+    DEFAULT_METADATA_FILE,
+    DEFAULT_VIEWS_FILE,
+    ENCODING,
+    JSON_ENSURE_ASCII,
+    MANIFEST_FILE,
+    RESTORE_PREVIOUS_SUFFIX,
+    RESTORE_STAGING_SUFFIX,
+    TEMP_FILE_SUFFIX,
+)
+from .storage import close_indexes, snapshot_table
+
+
+def _new_hash():
+    """Создает объект хэширования (hashlib импортируется только здесь)."""
+
+    import hashlib
+
+    return hashlib.new(BACKUP_HASH_ALGORITHM)
+
+
+def _object_path(target: Path, digest: str) -> Path:
+    """Возвращает путь к объекту резервной копии по хэшу содержимого."""
+
+    return target / BACKUP_OBJECTS_DIRECTORY / digest[:2] / digest
+
+
+def _store_bytes(target: Path, content: bytes, stats: dict) -> str:
+    """Сохраняет содержимое как объект (если такого еще нет) и возвращает хэш."""
+
+    hasher = _new_hash()
+    hasher.update(content)
+    digest = hasher.hexdigest()
+
+    object_path = _object_path(target, digest)
+    if not object_path.exists():
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = object_path.with_name(object_path.name + TEMP_FILE_SUFFIX)
+        temp_path.write_bytes(content)
+        os.replace(temp_path, object_path)
+        stats["copied"] += 1
+        stats["bytes"] += len(content)
+
+    stats["files"] += 1
+    return digest
+
+
+def _store_file(target: Path, filepath: Path, index: dict, stats: dict) -> str:
+    """
+    Сохраняет файл данных как объект и возвращает хэш содержимого.
+
+    Если размер и время изменения файла совпадают с прошлой копией,
+    файл не читается: хэш берется из индекса.
+    """
+
+    key = filepath.as_posix()
+    stat = filepath.stat()
+    cached = index.get(key)
+
+    if (cached and cached["size"] == stat.st_size
+            and cached["mtime_ns"] == stat.st_mtime_ns
+            and _object_path(target, cached["hash"]).exists()):
+        stats["files"] += 1
+        return cached["hash"]
+
+    # Файл копируется во временный объект с одновременным подсчетом хэша
+    objects_dir = target / BACKUP_OBJECTS_DIRECTORY
+    objects_dir.mkdir(parents=True, exist_ok=True)
+    temp_path = objects_dir / f"{os.getpid()}{TEMP_FILE_SUFFIX}"
+    hasher = _new_hash()
+    size = 0
+
+    with open(filepath, 'rb') as source, open(temp_path, 'wb') as dest:
+        for chunk in iter(lambda: source.read(BACKUP_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+            dest.write(chunk)
+            size += len(chunk)
+
+    digest = hasher.hexdigest()
+    object_path = _object_path(target, digest)
+    if object_path.exists():
+        temp_path.unlink()
+    else:
+        object_path.parent.mkdir(exist_ok=True)
+        os.replace(temp_path, object_path)
+        stats["copied"] += 1
+        stats["bytes"] += size
+
+    index[key] = {"size": size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+    stats["files"] += 1
+    return digest
+
+
+def _load_json(filepath: Path, default):
+    """Загружает служебный JSON-файл резервной копии."""
+
+    try:
+        with open(filepath, 'r', encoding=ENCODING) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def _save_json(filepath: Path, data) -> None:
+    """Атомарно сохраняет служебный JSON-файл резервной копии."""
+
+    temp_path = filepath.with_name(filepath.name + TEMP_FILE_SUFFIX)
+    with open(temp_path, 'w', encoding=ENCODING) as f:
+        json.dump(data, f, ensure_ascii=JSON_ENSURE_ASCII)
+    os.replace(temp_path, filepath)
+
+
+def backup_database(target_dir: str,
+                    metadata_file: str = DEFAULT_METADATA_FILE,
+                    views_file: str = DEFAULT_VIEWS_FILE) -> dict:
+    """
+    Создает инкрементальную резервную копию метаданных, определений
+    представлений и всех таблиц.
+
+    Каждая таблица копируется по закрепленному снимку, поэтому запись
+    во время копирования не попадает в нее наполовину. Объекты хранятся
+    по хэшу содержимого: неизмененные файлы и сегменты не копируются.
+
+    Returns:
+        Сведения о копии: created, files, copied, bytes
+    """
+
+    from datetime import datetime
+
+    target = Path(target_dir)
+    target.mkdir(parents=True, exist_ok=True)
+    index = _load_json(target / BACKUP_INDEX_FILE, {})
+    stats = {"files": 0, "copied": 0, "bytes": 0}
+
+    try:
+        metadata_content = Path(metadata_file).read_bytes()
+    except FileNotFoundError:
+        metadata_content = b"{}"
+
+    files = {}
+    for table_name in json.loads(metadata_content):
+        with snapshot_table(table_name) as (manifest, paths):
+            if manifest is not None:
+                # Удаленные сегменты (garbage) в копию не входят
+                manifest_content = json.dumps(
+                    dict(manifest, garbage=[]), ensure_ascii=JSON_ENSURE_ASCII)
+                files[f"{table_name}/{MANIFEST_FILE}"] = _store_bytes(
+                    target, manifest_content.encode(ENCODING), stats)
+
+            for filepath in paths:
+                relative = filepath.relative_to(DATA_DIRECTORY).as_posix()
+                files[relative] = _store_file(target, filepath, index, stats)
+
+    created = datetime.now()
+    snapshot = {
+        "created": created.isoformat(),
+        "metadata": _store_bytes(target, metadata_content, stats),
+        "files": files,
+    }
+    if Path(views_file).exists():
+        snapshot["views"] = _store_bytes(target, Path(views_file).read_bytes(),
+                                         stats)
+
+    snapshot_name = f"{created.strftime(BACKUP_SNAPSHOT_NAME_FORMAT)}.json"
+    snapshots_dir = target / BACKUP_SNAPSHOTS_DIRECTORY
+    snapshots_dir.mkdir(exist_ok=True)
+    _save_json(snapshots_dir / snapshot_name, snapshot)
+    _save_json(target / BACKUP_INDEX_FILE, index)
+
+    stats["created"] = snapshot["created"]
+    return stats
+
+
+def _find_snapshot(source: Path, timestamp: str = None) -> dict:
+    """Находит последнюю копию, созданную не позже timestamp."""
+
+    from datetime import datetime
+
+    moment = None
+    if timestamp is not None:
+        try:
+            moment = datetime.fromisoformat(timestamp)
+        except ValueError:
+            raise ValueError(f"Некорректное время: '{timestamp}'. Ожидается "
+                             f"ГГГГ-ММ-ДД или ГГГГ-ММ-ДДTЧЧ:ММ:СС") from None
+
+    names = sorted((source / BACKUP_SNAPSHOTS_DIRECTORY).glob("*.json"),
+                   reverse=True)
+    for path in names:
+        snapshot = _load_json(path, None)
+        if moment is None or datetime.fromisoformat(snapshot["created"]) <= moment:
+            return snapshot
+
+    raise ValueError(f"В каталоге '{source}' нет подходящей резервной копии.")
+
+
+def _restore_object(source: Path, digest: str, filepath: Path, name: str) -> None:
+    """Копирует объект в файл, проверяя контрольную сумму."""
+
+    hasher = _new_hash()
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(_object_path(source, digest), 'rb') as src, \
+            open(filepath, 'wb') as dest:
+        for chunk in iter(lambda: src.read(BACKUP_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+            dest.write(chunk)
+
+    if hasher.hexdigest() != digest:
+        raise ValueError(f"Контрольная сумма не совпадает: {name}")
+
+
+def restore_database(source_dir: str, timestamp: str = None,
+                     metadata_file: str = DEFAULT_METADATA_FILE,
+                     views_file: str = DEFAULT_VIEWS_FILE) -> dict:
+    """
+    Восстанавливает базу из резервной копии (последней или на момент
+    timestamp).
+
+    Файлы сначала восстанавливаются во временный каталог с проверкой
+    контрольных сумм. Текущие данные заменяются только если все файлы
+    копии целы.
+
+    Returns:
+        Описание восстановленной копии (created, files)
+    """
+
+    import shutil
+
+    source = Path(source_dir)
+    snapshot = _find_snapshot(source, timestamp)
+
+    data_dir = Path(DATA_DIRECTORY)
+    staging_dir = Path(DATA_DIRECTORY + RESTORE_STAGING_SUFFIX)
+    previous_dir = Path(DATA_DIRECTORY + RESTORE_PREVIOUS_SUFFIX)
+    metadata_path = Path(metadata_file)
+    metadata_temp = metadata_path.with_name(metadata_path.name + TEMP_FILE_SUFFIX)
+    views_path = Path(views_file)
+    views_temp = views_path.with_name(views_path.name + TEMP_FILE_SUFFIX)
+
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    try:
+        staging_dir.mkdir()
+        for relative, digest in snapshot["files"].items():
+            _restore_object(source, digest, staging_dir / relative, relative)
+        _restore_object(source, snapshot["metadata"], metadata_temp,
+                        metadata_path.name)
+        if "views" in snapshot:
+            _restore_object(source, snapshot["views"], views_temp,
+                            views_path.name)
+    except (OSError, ValueError):
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        metadata_temp.unlink(missing_ok=True)
+        views_temp.unlink(missing_ok=True)
+        raise
+
+    # Открытые индексы относятся к заменяемым данным
+    close_indexes()
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    if data_dir.exists():
+        os.replace(data_dir, previous_dir)
+    os.replace(staging_dir, data_dir)
+    os.replace(metadata_temp, metadata_path)
+    if "views" in snapshot:
+        os.replace(views_temp, views_path)
+    else:
+        views_path.unlink(missing_ok=True)
+    shutil.rmtree(previous_dir, ignore_errors=True)
+
+    return {"created": snapshot["created"], "files": len(snapshot["files"])}
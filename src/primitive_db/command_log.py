@@ -0,0 +1,171 @@
+import json
+import os
+import time
+from itertools import count
+from pathlib import Path
+
+from .constants import (
+    COMMAND_LOG_BACKUP_COUNT,
+    COMMAND_LOG_BATCH_SIZE,
+    COMMAND_LOG_ENABLED,
+    COMMAND_LOG_FILE,
+    COMMAND_LOG_FLUSH_INTERVAL,
+    COMMAND_LOG_MAX_BYTES,
+    COMMAND_LOG_QUEUE_SIZE,
+    COMMAND_LOG_SAMPLE_EVERY,
+    COMMAND_LOG_UNSAMPLED_EVENTS,
+    ENCODING,
+    JSON_ENSURE_ASCII,
+)
+
+_STOP = object()
+
+_queue = None
+_queue_full = None
+_thread = None
+_dropped = 0
+_dropped_lock = None
+_sample_counter = count()
+# Попадает ли в журнал текущая команда (см. sample_command)
+_command_sampled = True
+
+
+def _start() -> None:
+    """
+    Лениво запускает фоновый поток записи журнала (threading и queue
+    импортируются только при первой записи).
+    """
+
+    global _queue, _queue_full, _thread, _dropped_lock
+    import atexit
+    import queue
+    import threading
+
+    _queue = queue.Queue(maxsize=COMMAND_LOG_QUEUE_SIZE)
+    _queue_full = queue.Full
+    _dropped_lock = threading.Lock()
+    _thread = threading.Thread(target=_writer_loop, name="command-log",
+                               daemon=True)
+    _thread.start()
+    atexit.register(close)
+
+
+def sample_command() -> bool:
+    """
+    Решает один раз на команду, попадет ли она в журнал: записывается
+    каждая COMMAND_LOG_SAMPLE_EVERY-я команда вместе со всеми событиями,
+    записанными во время ее выполнения.
+    """
+
+    global _command_sampled
+
+    _command_sampled = not next(_sample_counter) % COMMAND_LOG_SAMPLE_EVERY
+    return _command_sampled
+
+
+def log_event(event: dict) -> None:
+    """
+    Добавляет запись в журнал команд без ожидания записи на диск.
+
+    События команды, не попавшей в выборку (см. sample_command),
+    не записываются, кроме событий с ошибкой и событий
+    COMMAND_LOG_UNSAMPLED_EVENTS. Если очередь переполнена, запись
+    отбрасывается, а число отброшенных записей попадает в журнал позже.
+    """
+
+    global _dropped
+
+    if not COMMAND_LOG_ENABLED:
+        return
+    if (not _command_sampled and event.get("error") is None
+            and event.get("event") not in COMMAND_LOG_UNSAMPLED_EVENTS):
+        return
+    if _queue is None:
+        _start()
+
+    event["ts"] = time.time()
+    try:
+        _queue.put_nowait(event)
+    except _queue_full:
+        with _dropped_lock:
+            _dropped += 1
+
+
+def _rotate(f):
+    """Переименовывает commands.log в commands.log.1 (и далее) и открывает новый."""
+
+    f.close()
+    for number in range(COMMAND_LOG_BACKUP_COUNT - 1, 0, -1):
+        older = Path(f"{COMMAND_LOG_FILE}.{number}")
+        if older.exists():
+            os.replace(older, f"{COMMAND_LOG_FILE}.{number + 1}")
+    os.replace(COMMAND_LOG_FILE, f"{COMMAND_LOG_FILE}.1")
+    return open(COMMAND_LOG_FILE, 'a', encoding=ENCODING)
+
+
+def _write_batch(f, batch: list):
+    """Записывает пачку записей одной операцией и при необходимости ротирует файл."""
+
+    global _dropped
+
+    with _dropped_lock:
+        dropped, _dropped = _dropped, 0
+    if dropped:
+        batch.append({"ts": time.time(), "event": "dropped", "count": dropped})
+
+    f.write("".join(json.dumps(event, ensure_ascii=JSON_ENSURE_ASCII,
+                               default=str) + "\n"
+                    for event in batch))
+    f.flush()
+
+    if f.tell() >= COMMAND_LOG_MAX_BYTES:
+        return _rotate(f)
+    return f
+
+
+def _writer_loop() -> None:
+    """
+    Фоновый поток: собирает записи из очереди в пачки (до
+    COMMAND_LOG_BATCH_SIZE записей или COMMAND_LOG_FLUSH_INTERVAL секунд)
+    и пишет каждую пачку в файл одной операцией.
+    """
+
+    import queue
+
+    Path(COMMAND_LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
+    f = open(COMMAND_LOG_FILE, 'a', encoding=ENCODING)
+
+    try:
+        while True:
+            event = _queue.get()
+            deadline = time.monotonic() + COMMAND_LOG_FLUSH_INTERVAL
+            batch = []
+
+            while event is not _STOP:
+                batch.append(event)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= COMMAND_LOG_BATCH_SIZE or remaining <= 0:
+                    break
+                try:
+                    event = _queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if batch:
+                f = _write_batch(f, batch)
+            if event is _STOP:
+                return
+    finally:
+        f.close()
+
+
+def close() -> None:
+    """Дописывает накопленные записи и останавливает поток (при выходе)."""
+
+    global _queue, _thread
+
+    if _thread is None:
+        return
+    _queue.put(_STOP)
+    _thread.join()
+    _queue = _thread = None
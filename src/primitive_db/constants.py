@@ -4,6 +4,19 @@ TYPE_BOOL = "bool"
 TYPE_STR = "str"
 SUPPORTED_TYPES = {TYPE_INT, TYPE_STR, TYPE_BOOL}
 
+# === МОДИФИКАТОРЫ СТОЛБЦОВ ===
+# <столбец>:<тип>[:unique][:not_null][:ttl]
+MODIFIER_UNIQUE = "unique"
+MODIFIER_NOT_NULL = "not_null"
+# Столбец срока жизни записи (int, время истечения в секундах Unix)
+MODIFIER_TTL = "ttl"
+COLUMN_MODIFIERS = (MODIFIER_UNIQUE, MODIFIER_NOT_NULL, MODIFIER_TTL)
+# Аргумент set_ttl, отключающий срок жизни
+TTL_OFF = "off"
+
+# Пустое значение в командах
+NULL_VALUE = "null"
+
 # === ЗНАЧЕНИЯ BOOL ===
 BOOL_TRUE_VALUES = ["true", "yes", "да"]
 BOOL_FALSE_VALUES = ["false", "no", "нет"]
@@ -12,16 +25,25 @@ BOOL_FALSE_VALUES = ["false", "no", "нет"]
 ID_COLUMN = "ID"
 DEFAULT_ID_COLUMN = f"{ID_COLUMN}:{TYPE_INT}"
 
+# === ЗАПИСИ ===
+# Префикс имен слотов в классах записей (_f0, _f1, ...)
+RECORD_SLOT_PREFIX = "_f"
+
 # === СИМВОЛЫ И РАЗДЕЛИТЕЛИ ===
 COLUMN_TYPE_SEPARATOR = ":"
 QUOTE_CHARS = {'"', "'"}
 OPEN_PAREN = '('
 CLOSE_PAREN = ')'
 COMMA = ','
-SPACE = ' '
-EQUALS_SIGN = '='
-QUOTE_SINGLE = "'"
-QUOTE_DOUBLE = '"'
+PARAM_PLACEHOLDER = '?'
+
+# === ОПЕРАТОРЫ СРАВНЕНИЯ (WHERE) ===
+OP_EQ = "="
+OP_NE = "!="
+OP_GT = ">"
+OP_GE = ">="
+OP_LT = "<"
+OP_LE = "<="
 
 # === КОМАНДЫ И КЛЮЧЕВЫЕ СЛОВА ===
 
@@ -31,64 +53,185 @@ KEYWORD_VALUES = "values"
 KEYWORD_FROM = "from"
 KEYWORD_WHERE = "where"
 KEYWORD_SET = "set"
-
-# === ПОЗИЦИИ АРГУМЕНТОВ ===
-# Общие позиции
-POS_COMMAND = 0
-POS_FIRST_ARG = 1
-
-# create_table: create_table <table_name> <column1:type> ...
-POS_CREATE_TABLE_NAME = 1
-POS_CREATE_COLUMNS_START = 2
-
-# drop_table: drop_table <table_name>
-POS_DROP_TABLE_NAME = 1
-
-# insert: insert into <table_name> values (...)
-POS_INSERT_KEYWORD_INTO = 1
-POS_INSERT_TABLE_NAME = 2
-POS_INSERT_KEYWORD_VALUES = 3
-POS_INSERT_VALUES_START = 4
-
-# select: select from <table_name> [where ...]
-POS_SELECT_KEYWORD_FROM = 1
-POS_SELECT_TABLE_NAME = 2
-POS_SELECT_KEYWORD_WHERE = 3
-POS_SELECT_WHERE_START = 4
-
-# update: update <table_name> set ... where ...
-POS_UPDATE_TABLE_NAME = 1
-POS_UPDATE_KEYWORD_SET = 2
-# WHERE позиция определяется динамически
-
-# delete: delete from <table_name> where ...
-POS_DELETE_KEYWORD_FROM = 1
-POS_DELETE_TABLE_NAME = 2
-POS_DELETE_KEYWORD_WHERE = 3
-POS_DELETE_WHERE_START = 4
-
-# info: info <table_name>
-POS_INFO_TABLE_NAME = 1
-
-# === МИНИМАЛЬНОЕ КОЛИЧЕСТВО АРГУМЕНТОВ ===
-MIN_ARGS_CREATE_TABLE = 3  # create_table + имя + хотя бы 1 столбец
-MIN_ARGS_DROP_TABLE = 2  # drop_table + имя
-MIN_ARGS_INSERT = 5  # insert into <table> values (...)
-MIN_ARGS_SELECT = 3  # select from <table>
-MIN_ARGS_UPDATE = 7  # update <table> set ... where ...
-MIN_ARGS_DELETE = 5  # delete from <table> where ...
-MIN_ARGS_INFO = 2  # info <table>
+KEYWORD_AS = "as"
+KEYWORD_ORDER = "order"
+KEYWORD_BY = "by"
+KEYWORD_ASC = "asc"
+KEYWORD_DESC = "desc"
+KEYWORD_LIMIT = "limit"
+KEYWORD_AT = "at"
+KEYWORD_MATERIALIZED = "materialized"
+KEYWORD_VIEW = "view"
+KEYWORD_SELECT = "select"
+
+# Команды, которые можно подготовить через prepare
+PREPARABLE_COMMANDS = {"insert", "select", "update", "delete"}
+
+# === ТОКЕНЫ ===
+TOKEN_STRING = "string"
+TOKEN_NUMBER = "number"
+TOKEN_WORD = "word"
+TOKEN_OPERATOR = "operator"
+TOKEN_PUNCT = "punct"
+TOKEN_PARAM = "param"
+
+# === КЭШ РАЗОБРАННЫХ КОМАНД ===
+STATEMENT_CACHE_SIZE = 256
 
 # === ФАЙЛОВАЯ СИСТЕМА ===
 DEFAULT_METADATA_FILE = "db_meta.json"
+# Определения материализованных представлений: {имя: {table, where}}
+DEFAULT_VIEWS_FILE = "db_views.json"
 DATA_DIRECTORY = "data"
 TABLE_FILE_EXTENSION = ".json"
 ENCODING = "utf-8"
 JSON_INDENT = 2
 JSON_ENSURE_ASCII = False
+JSON_COMPACT_SEPARATORS = (",", ":")
+
+# === ФОРМАТЫ ХРАНЕНИЯ ТАБЛИЦ ===
+STORAGE_JSON = "json"  # список объектов с отступами (исходный формат)
+STORAGE_COMPACT = "compact"  # JSON Lines без отступов: заголовок + строки-массивы
+STORAGE_GZIP = "gzip"
+STORAGE_LZMA = "lzma"
+STORAGE_ZSTD = "zstd"  # требует необязательный пакет zstandard
+STORAGE_FORMATS = (
+    STORAGE_JSON,
+    STORAGE_COMPACT,
+    STORAGE_GZIP,
+    STORAGE_LZMA,
+    STORAGE_ZSTD,
+)
+# Все форматы, кроме json, хранят таблицу сегментами в data/<таблица>/
+SEGMENTED_STORAGE_FORMATS = (
+    STORAGE_COMPACT,
+    STORAGE_GZIP,
+    STORAGE_LZMA,
+    STORAGE_ZSTD,
+)
+DEFAULT_STORAGE_FORMAT = STORAGE_COMPACT
+STORAGE_FILE_EXTENSIONS = {
+    STORAGE_JSON: TABLE_FILE_EXTENSION,
+    STORAGE_COMPACT: ".jsonl",
+    STORAGE_GZIP: ".jsonl.gz",
+    STORAGE_LZMA: ".jsonl.xz",
+    STORAGE_ZSTD: ".jsonl.zst",
+}
+COMPACT_HEADER_COLUMNS = "columns"
+
+# === СЕГМЕНТЫ ===
+SEGMENT_SIZE = 10_000  # максимальное число записей в сегменте
+SEGMENT_FILE_PREFIX = "seg_"
+MANIFEST_FILE = "manifest.json"
+TEMP_FILE_SUFFIX = ".tmp"
+
+# === ИНДЕКСЫ ===
+# Хэш-индексы уникальных столбцов (dbm): data/<таблица>.index.<столбец>
+INDEX_FILE_INFIX = ".index."
+# Ключ-отметка полностью построенного индекса
+INDEX_COMPLETE_KEY = b"\x00complete"
+# Блокировка изменения таблицы между процессами: data/<таблица>.lock.
+# Команды, которые читают или меняют индексы, выполняются под ней, а индексы
+# закрываются до снятия блокировки
+TABLE_LOCK_SUFFIX = ".lock"
+TABLE_LOCK_COMMANDS = ("insert", "update", "delete", "check", "vacuum",
+                       "set_storage", "set_ttl", "drop_table")
+
+# === СНИМКИ (MVCC) ===
+# Каталог закреплений версий таблицы читателями: файл <версия>-<pid>-<n>.pin
+PINS_DIRECTORY = "pins"
+PIN_FILE_SUFFIX = ".pin"
+
+# === ВЫВОД РЕЗУЛЬТАТОВ ===
+OUTPUT_TABLE = "table"
+OUTPUT_TSV = "tsv"
+OUTPUT_CSV = "csv"
+OUTPUT_JSONL = "jsonl"
+OUTPUT_NONE = "none"
+OUTPUT_FORMATS = (OUTPUT_TABLE, OUTPUT_TSV, OUTPUT_CSV, OUTPUT_JSONL, OUTPUT_NONE)
+DEFAULT_OUTPUT_FORMAT = OUTPUT_TABLE
+# Результаты больше этого числа записей выводятся в режиме table потоково,
+# с шириной столбцов по первым OUTPUT_SAMPLE_SIZE записям
+OUTPUT_SAMPLE_SIZE = 1000
+TRUNCATION_MARK = "…"
+
+# === ПАРАЛЛЕЛЬНОЕ СКАНИРОВАНИЕ ===
+# Таблицы меньше порога сканируются в одном процессе
+PARALLEL_SCAN_THRESHOLD = 200_000
+# Число процессов пула (None - по числу ядер)
+PARALLEL_SCAN_WORKERS = None
+
+# === РЕЗЕРВНОЕ КОПИРОВАНИЕ ===
+# Каталог резервных копий: objects/<xx>/<sha256> - файлы по хэшу содержимого,
+# snapshots/<время>.json - состав каждой копии, index.json - хэши файлов
+# по размеру и времени изменения (чтобы не перечитывать неизмененные)
+BACKUP_OBJECTS_DIRECTORY = "objects"
+BACKUP_SNAPSHOTS_DIRECTORY = "snapshots"
+BACKUP_INDEX_FILE = "index.json"
+BACKUP_SNAPSHOT_NAME_FORMAT = "%Y%m%dT%H%M%S%f"
+BACKUP_HASH_ALGORITHM = "sha256"
+BACKUP_CHUNK_SIZE = 1024 * 1024
+# Временный каталог восстановления и каталог прежних данных рядом с data/
+RESTORE_STAGING_SUFFIX = ".restore"
+RESTORE_PREVIOUS_SUFFIX = ".old"
+
+# === ПРОВЕРКА И ОБСЛУЖИВАНИЕ (check / vacuum) ===
+CHECK_MAX_PROBLEMS = 20  # сколько проблем выводить подробно
+VACUUM_PROGRESS_EVERY = 10  # выводить прогресс каждые N сегментов
+# Ограничение скорости чтения vacuum, байт/с (None - без ограничения),
+# чтобы обслуживание не мешало рабочей нагрузке
+VACUUM_IO_LIMIT = 32 * 1024 * 1024
+
+# === СРОК ЖИЗНИ ЗАПИСЕЙ (TTL) ===
+# Истекшие записи сразу не видны select, а удаляет их фоновый поток
+# раз в TTL_SWEEP_INTERVAL секунд. Сегменты, где истекли все записи,
+# удаляются без чтения; частично истекшие сегменты переписываются,
+# не больше TTL_SWEEP_BATCH_SEGMENTS за проход.
+TTL_SWEEP_INTERVAL = 60
+TTL_SWEEP_BATCH_SEGMENTS = 8
+
+# === ЖУРНАЛ КОМАНД ===
+# Записи (JSON Lines) пишет фоновый поток: команда только кладет запись
+# в ограниченную очередь и не ждет записи на диск
+COMMAND_LOG_ENABLED = True
+COMMAND_LOG_FILE = "logs/commands.log"
+COMMAND_LOG_QUEUE_SIZE = 10_000  # при переполнении записи отбрасываются
+COMMAND_LOG_BATCH_SIZE = 500  # записей за одну запись на диск
+COMMAND_LOG_FLUSH_INTERVAL = 0.5  # секунд между сбросами неполной пачки
+COMMAND_LOG_MAX_BYTES = 10 * 1024 * 1024  # размер файла для ротации
+COMMAND_LOG_BACKUP_COUNT = 5  # число старых файлов commands.log.N
+# Записывается каждая N-я команда со всеми ее событиями (1 - все);
+# для больших нагрузок
+COMMAND_LOG_SAMPLE_EVERY = 1
+# События, которые пишутся всегда (как и любые события с ошибкой)
+COMMAND_LOG_UNSAMPLED_EVENTS = ("ttl_sweep", "dropped")
+
+# === СОРТИРОВКА ===
+# Результаты больше этого числа записей сортируются внешней сортировкой:
+# отсортированные серии такого размера сбрасываются во временные файлы
+# и затем сливаются
+SORT_RUN_SIZE = 100_000
+
+# === ИЗМЕНЕНИЕ БОЛЬШИХ ТАБЛИЦ ===
+# update/delete таблицы, которая по оценке займет в памяти больше
+# MUTATION_MEMORY_LIMIT байт, выполняются потоково: записи по одной
+# переписываются в новые сегменты (0 - всегда потоково)
+MUTATION_MEMORY_LIMIT = 256 * 1024 * 1024
+# Во сколько раз записи однофайловой таблицы в памяти больше ее файла
+# (оценка без чтения файла)
+JSON_MEMORY_RATIO = 3
 
 # === РЕГУЛЯРНЫЕ ВЫРАЖЕНИЯ ===
-ASSIGNMENT_PATTERN = r'^\s*(\w+)\s*=\s*([^=]+?)\s*$'
+# Один токен команды: строка в кавычках, оператор, скобка/запятая,
+# параметр ? или слово (имя, число, тип столбца)
+TOKEN_PATTERN = (
+    r'\s*(?:(?P<string>"[^"]*"|\'[^\']*\')'
+    r'|(?P<operator>!=|>=|<=|=|>|<)'
+    r'|(?P<punct>[(),])'
+    r'|(?P<param>\?)'
+    r'|(?P<word>[^\s(),=!<>?"\']+))'
+)
+INTEGER_PATTERN = r'-?(0|[1-9]\d*)'
 
 # === КЭШИРОВАНИЕ ===
 CACHE_KEY_FORMAT = "{where_clause}_{table_hash}"
@@ -1,86 +1,177 @@
-import json
+import time
+from itertools import islice
 
 from ..decorators import confirm_action, create_cacher, handle_db_errors, log_time
 from .constants import (
     BOOL_FALSE_VALUES,
     BOOL_TRUE_VALUES,
     CACHE_KEY_FORMAT,
+    CHECK_MAX_PROBLEMS,
+    COLUMN_MODIFIERS,
     COLUMN_TYPE_SEPARATOR,
     DEFAULT_ID_COLUMN,
     ID_COLUMN,
-    QUOTE_CHARS,
+    MODIFIER_NOT_NULL,
+    MODIFIER_TTL,
+    MODIFIER_UNIQUE,
+    STORAGE_FORMATS,
     SUPPORTED_TYPES,
+    TTL_OFF,
     TYPE_BOOL,
     TYPE_INT,
     TYPE_STR,
+    VACUUM_PROGRESS_EVERY,
 )
-from .utils import load_table_data
+from .records import make_record
+from .scan import filter_records, find_matches, record_matcher
+from .sort import external_sort, top_k
+from .utils import (
+    count_table_records,
+    create_backup,
+    drop_table_indexes,
+    find_by_unique_value,
+    get_next_table_id,
+    get_table_sort_column,
+    get_table_storage_info,
+    iter_table_data,
+    load_table_data,
+    restore_backup,
+    rewrite_table_data,
+    save_table_data,
+    scan_table_data,
+    vacuum_table_data,
+    verify_table_data,
+    verify_table_index,
+)
+from .views import view_definition
 
 _select_cacher = create_cacher()
 
 
-def _parse_value(value_str: str, expected_type: str):
-    """Парсит строковое значение в нужный тип."""
-    
-    value_str = value_str.strip()
+class _Unchanged(Exception):
+    """Потоковое изменение не затронуло ни одной записи (новая версия не нужна)."""
+
+
+class _ConstraintViolation(Exception):
+    """Потоковое изменение нарушает ограничение (новая версия не сохраняется)."""
+
+
+def _parse_value(value, expected_type: str):
+    """
+    Приводит значение из команды к типу столбца.
+
+    Парсер уже возвращает числа как int, поэтому значения нужного типа
+    возвращаются без повторного разбора. null (None) остается None.
+    """
     
+    if value is None:
+        return None
+
     if expected_type == TYPE_INT:
-        return int(value_str)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        return int(str(value).strip())
     
     elif expected_type == TYPE_BOOL:
-        if value_str.lower() in BOOL_TRUE_VALUES:
+        if isinstance(value, bool):
+            return value
+        value_str = str(value).strip().lower()
+        if value_str in BOOL_TRUE_VALUES:
             return True
-        elif value_str.lower() in BOOL_FALSE_VALUES:
+        elif value_str in BOOL_FALSE_VALUES:
             return False
         else:
-            raise ValueError(f"Невозможно преобразовать '{value_str}' в bool")
+            raise ValueError(f"Невозможно преобразовать '{value}' в bool")
     
     elif expected_type == TYPE_STR:
-        if len(value_str) >= 2 and value_str[0] in QUOTE_CHARS \
-        and value_str[-1] in QUOTE_CHARS:
-            
-            return value_str[1:-1]
-        return value_str
+        if isinstance(value, bool):
+            return str(value).lower()
+        return str(value)
     
     else:
         raise ValueError(f"Неизвестный тип: {expected_type}")
 
 
+def _parse_column_def(col_def: str) -> tuple:
+    """Разбирает определение столбца <имя>:<тип>[:<модификатор>...]."""
+
+    col_name, col_type, *modifiers = col_def.split(COLUMN_TYPE_SEPARATOR)
+    return col_name, col_type, modifiers
+
+
+def _column_constraints(metadata: dict, table_name: str) -> tuple:
+    """Возвращает (уникальные столбцы, столбцы not null) таблицы."""
+
+    unique_columns, not_null_columns = [], []
+    for col_name, _, modifiers in map(_parse_column_def, metadata[table_name]):
+        if MODIFIER_UNIQUE in modifiers:
+            unique_columns.append(col_name)
+        if MODIFIER_NOT_NULL in modifiers:
+            not_null_columns.append(col_name)
+    return unique_columns, not_null_columns
+
+
+def expiry_column(metadata: dict, table_name: str):
+    """Возвращает столбец срока жизни (ttl) таблицы или None."""
+
+    for col_name, _, modifiers in map(_parse_column_def, metadata[table_name]):
+        if MODIFIER_TTL in modifiers:
+            return col_name
+    return None
+
+
+def live_records(metadata: dict, table_name: str, records):
+    """
+    Исключает записи с истекшим сроком жизни (значение столбца ttl не позже
+    текущего времени). Список возвращается списком, итератор - итератором.
+    """
+
+    column = expiry_column(metadata, table_name)
+    if column is None:
+        return records
+
+    now = time.time()
+    live = (record for record in records
+            if record[column] is None or record[column] > now)
+    return list(live) if isinstance(records, list) else live
+
+
+def _indexed_record_gone(metadata: dict, table_name: str, record_id: int,
+                         column: str, value) -> bool:
+    """
+    Проверяет, что найденной по индексу записи record_id со значением value
+    столбца column нет среди живых: она истекла (ждет фоновой очистки),
+    уже удалена очисткой (ключ индекса остался) или ее ID занят новой
+    записью с другим значением. Читаются только сегменты, которые
+    по зональным картам содержат этот ID.
+    """
+
+    if expiry_column(metadata, table_name) is None:
+        return False
+
+    condition = {ID_COLUMN: record_id}
+    records = filter_records(iter_table_data(table_name, condition), condition)
+    return not any(record[column] == value
+                   for record in live_records(metadata, table_name, records))
+
+
 def _validate_clause(table_data: list, clause: dict) -> bool:
-    """Проверяет, что столбец в условии существует в таблице."""
+    """Проверяет, что столбцы в условии существуют в таблице."""
     
     if not table_data:
         print("Ошибка: Таблица пуста.")
         return False
     
     first_record = table_data[0]
-    clause_column = next(iter(clause))
-    
-    if clause_column not in first_record:
-        valid_columns = ", ".join(sorted(first_record.keys()))
-        print(f'Ошибка: Столбец "{clause_column}" не существует в таблице. '
-              f'Допустимые столбцы: {valid_columns}')
-        return False
     
-    return True
-
-
-def _matches_condition(record: dict, condition: dict) -> bool:
-    """Проверяет, удовлетворяет ли запись условию."""
-
-    for col, value in condition.items():
-        if str(record.get(col, "")) != str(value):
+    for clause_column in clause:
+        if clause_column not in first_record:
+            valid_columns = ", ".join(sorted(first_record.keys()))
+            print(f'Ошибка: Столбец "{clause_column}" не существует в таблице. '
+                  f'Допустимые столбцы: {valid_columns}')
             return False
-        
-    return True
-
-
-def _get_next_id(table_data: list) -> int:
-    """Возвращает следующий доступный ID для таблицы."""
     
-    if not table_data:
-        return 1
-    return max(record.get(ID_COLUMN, 0) for record in table_data) + 1
+    return True
 
 
 @handle_db_errors
@@ -92,6 +183,7 @@ def create_table(metadata: dict, table_name: str, columns: list) -> dict:
         return metadata
     
     has_user_id = False
+    has_ttl = False
     table_columns = []
     
     for col_def in columns:
@@ -99,17 +191,26 @@ def create_table(metadata: dict, table_name: str, columns: list) -> dict:
             print(f"Некорректное значение: '{col_def}'. Попробуйте снова.")
             return metadata
         
-        col_name, col_type = col_def.split(COLUMN_TYPE_SEPARATOR, 1)
+        col_name, col_type, modifiers = _parse_column_def(col_def)
         col_type = col_type.lower()
+        modifiers = [modifier.lower() for modifier in modifiers]
         
         if col_name.upper() == ID_COLUMN:
             has_user_id = True
         
-        if col_type not in SUPPORTED_TYPES:
+        if (col_type not in SUPPORTED_TYPES
+                or any(modifier not in COLUMN_MODIFIERS for modifier in modifiers)
+                or (MODIFIER_TTL in modifiers and col_type != TYPE_INT)):
             print(f"Некорректное значение: '{col_def}'. Попробуйте снова.")
             return metadata
+
+        if MODIFIER_TTL in modifiers and has_ttl:
+            print("Ошибка: Столбец ttl у таблицы может быть только один.")
+            return metadata
+        has_ttl = has_ttl or MODIFIER_TTL in modifiers
         
-        table_columns.append(f"{col_name}:{col_type}")
+        table_columns.append(COLUMN_TYPE_SEPARATOR.join(
+            [col_name, col_type, *dict.fromkeys(modifiers)]))
     
     if not has_user_id:
         table_columns.insert(0, DEFAULT_ID_COLUMN)
@@ -136,25 +237,82 @@ def drop_table(metadata: dict, table_name: str) -> dict:
     return metadata
 
 
-def list_tables(metadata: dict) -> None:
-    """Выводит список всех таблиц."""
+def list_tables(metadata: dict, views: dict = None) -> None:
+    """Выводит список всех таблиц (и материализованных представлений)."""
     
     if not metadata:
         print("Нет созданных таблиц.")
         return
     
+    views = views or {}
     for table_name in metadata:
-        print(f"- {table_name}")
+        if table_name in views:
+            print(f"- {table_name} (материализованное представление таблицы "
+                  f"\"{views[table_name]['table']}\")")
+        else:
+            print(f"- {table_name}")
+
+
+@handle_db_errors
+def create_view(metadata: dict, views: dict, view_name: str, statement) -> bool:
+    """
+    Создает материализованное представление: результат select сохраняется
+    как таблица, которая затем обновляется по изменениям базовой таблицы.
+
+    Returns:
+        True, если представление создано
+    """
+
+    table_name = statement.table
+    if view_name in metadata:
+        print(f'Ошибка: Таблица "{view_name}" уже существует.')
+        return False
+    if table_name not in metadata:
+        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        return False
+    if table_name in views:
+        print("Ошибка: Представление нельзя строить по другому представлению.")
+        return False
+
+    columns = _table_columns(metadata, table_name)
+    for column in statement.where or {}:
+        if column not in columns:
+            print(f'Ошибка: Столбец "{column}" не существует в таблице. '
+                  f'Допустимые столбцы: {", ".join(sorted(columns))}')
+            return False
+
+    # Истекшие записи в представление не копируются
+    records = live_records(metadata, table_name,
+                           scan_table_data(table_name, statement.where))
+    save_table_data(view_name, list(records))
+
+    # Ограничения проверяются в базовой таблице, срок жизни сохраняется
+    metadata[view_name] = [
+        COLUMN_TYPE_SEPARATOR.join(
+            [col_name, col_type] + [MODIFIER_TTL] * (MODIFIER_TTL in modifiers))
+        for col_name, col_type, modifiers
+        in map(_parse_column_def, metadata[table_name])
+    ]
+    views[view_name] = view_definition(table_name, statement.where)
+    print(f'Материализованное представление "{view_name}" создано '
+          f'(записей: {count_table_records(view_name)}).')
+    return True
 
 
 @log_time
 @handle_db_errors
-def insert(metadata: dict, table_name: str, values: list) -> list:
-    """Добавляет новую запись в таблицу и возвращает обновленные данные."""
+def insert(metadata: dict, table_name: str, values: list):
+    """
+    Создает новую запись для таблицы и возвращает ее (или None при ошибке).
+
+    Ограничения not null и unique проверяются до создания записи:
+    уникальность - по хэш-индексу столбца, без чтения таблицы.
+    Запись не сохраняется: ее дописывает в таблицу вызывающий код.
+    """
     
     if table_name not in metadata:
         print(f'Ошибка: Таблица "{table_name}" не существует.')
-        return []
+        return None
     
     table_columns = metadata[table_name]
     user_columns_count = len(table_columns) - 1
@@ -162,22 +320,60 @@ def insert(metadata: dict, table_name: str, values: list) -> list:
     if len(values) != user_columns_count:
         print(f"Ошибка: Ожидается {user_columns_count} значений, "
               f"получено {len(values)}.")
-        return []
+        return None
     
-    table_data = load_table_data(table_name)
-    new_id = _get_next_id(table_data)
-    new_record = {ID_COLUMN: new_id}
+    new_id = get_next_table_id(table_name)
+    column_names = [ID_COLUMN]
+    record_values = [new_id]
 
     for i, col_def in enumerate(table_columns[1:], 0):
-        col_name, col_type = col_def.split(COLUMN_TYPE_SEPARATOR, 1)
+        col_name, col_type, _ = _parse_column_def(col_def)
         
         parsed_value = _parse_value(values[i], col_type)
-        new_record[col_name] = parsed_value
-    
-    table_data.append(new_record)
+        column_names.append(col_name)
+        record_values.append(parsed_value)
+    
+    new_record = make_record(column_names, record_values)
+    unique_columns, not_null_columns = _column_constraints(metadata, table_name)
+
+    for col_name in not_null_columns:
+        if new_record[col_name] is None:
+            print(f'Ошибка: Столбец "{col_name}" не может быть null. '
+                  f'Запись: {new_record.to_dict()}')
+            return None
+
+    for col_name in unique_columns:
+        value = new_record[col_name]
+        existing_id = None if value is None else \
+            find_by_unique_value(table_name, col_name, value)
+        if (existing_id is not None
+                and not _indexed_record_gone(metadata, table_name,
+                                             existing_id, col_name, value)):
+            print(f'Ошибка: Значение {value!r} столбца "{col_name}" уже есть '
+                  f'в записи ID={existing_id}. Запись: {new_record.to_dict()}')
+            return None
+
     print(f'Запись с ID={new_id} успешно добавлена в таблицу "{table_name}".')
     
-    return table_data
+    return new_record
+
+
+@handle_db_errors
+def coerce_set_clause(metadata: dict, table_name: str, set_clause: dict) -> dict:
+    """
+    Приводит значения SET к типам столбцов таблицы.
+
+    Значения неизвестных столбцов не меняются - их отклонит update.
+    """
+
+    column_types = {col_name: col_type for col_name, col_type, _
+                    in map(_parse_column_def, metadata[table_name])}
+
+    return {
+        column: _parse_value(value, column_types[column])
+        if column in column_types else value
+        for column, value in set_clause.items()
+    }
 
 
 @log_time
@@ -188,7 +384,8 @@ def select(table_data: list, where_clause: dict = None) -> list:
     if not where_clause:
         return table_data
 
-    table_hash = hash(json.dumps(table_data, sort_keys=True)) if table_data else 0
+    table_hash = hash(tuple(record.values() for record in table_data)) \
+        if table_data else 0
     cache_key = CACHE_KEY_FORMAT.format(
         where_clause=str(where_clause),
         table_hash=table_hash
@@ -197,15 +394,54 @@ def select(table_data: list, where_clause: dict = None) -> list:
     def get_filtered_data():
         if not _validate_clause(table_data, where_clause):
             return []
-        filtered_data = []
-        for record in table_data:
-            if _matches_condition(record, where_clause):
-                filtered_data.append(record)
-        return filtered_data
+        return [table_data[i] for i in find_matches(table_data, where_clause)]
     
     return _select_cacher(cache_key, get_filtered_data)
 
 
+def _table_columns(metadata: dict, table_name: str) -> list:
+    """Возвращает имена столбцов таблицы из метаданных."""
+
+    return [_parse_column_def(col_def)[0] for col_def in metadata[table_name]]
+
+
+@handle_db_errors
+def select_ordered(metadata: dict, table_name: str, where_clause: dict = None,
+                   order_by: str = None, descending: bool = False,
+                   limit: int = None):
+    """
+    Возвращает итератор записей с сортировкой (order by) и/или limit.
+
+    Записи читаются потоково по сегментам. Если таблица хранится
+    упорядоченной по столбцу сортировки (ID), сортировка не нужна: сегменты
+    читаются в прямом или обратном порядке, а при limit чтение
+    останавливается после limit записей. Иначе при limit используется
+    top-k на куче, без limit - внешняя сортировка слиянием.
+    """
+
+    columns = _table_columns(metadata, table_name)
+    checked_columns = list(where_clause or {})
+    if order_by is not None:
+        checked_columns.append(order_by)
+
+    for column in checked_columns:
+        if column not in columns:
+            print(f'Ошибка: Столбец "{column}" не существует в таблице. '
+                  f'Допустимые столбцы: {", ".join(sorted(columns))}')
+            return None
+
+    presorted = order_by is None or order_by == get_table_sort_column(table_name)
+    records = scan_table_data(table_name, where_clause,
+                              reverse=presorted and descending)
+    records = live_records(metadata, table_name, records)
+
+    if presorted:
+        return islice(records, limit)
+    if limit is not None:
+        return iter(top_k(records, order_by, limit, descending))
+    return external_sort(records, order_by, descending)
+
+
 @handle_db_errors
 def update(table_data: list, set_clause: dict, where_clause: dict) -> list:
     """Обновляет записи в данных таблицы."""
@@ -215,11 +451,12 @@ def update(table_data: list, set_clause: dict, where_clause: dict) -> list:
     if not _validate_clause(table_data, where_clause):
         return table_data
 
+    matches = set(find_matches(table_data, where_clause))
     updated_data = []
     
-    for record in table_data:
+    for i, record in enumerate(table_data):
         record_copy = record.copy()
-        if _matches_condition(record_copy, where_clause):
+        if i in matches:
             for col, new_value in set_clause.items():
                 record_copy[col] = new_value
         
@@ -228,6 +465,227 @@ def update(table_data: list, set_clause: dict, where_clause: dict) -> list:
     return updated_data
 
 
+@handle_db_errors
+def check_constraints(metadata: dict, table_name: str, table_data: list,
+                      changed_rows: set = None) -> bool:
+    """
+    Проверяет ограничения not null и unique (и уникальность ID)
+    для измененных данных таблицы.
+
+    Используется перед сохранением update: при нарушении выводится
+    первая нарушающая запись, и данные не сохраняются целиком.
+
+    Args:
+        changed_rows: Индексы измененных записей в table_data (None - все).
+            Not null проверяется только у них, а при повторе уникального
+            значения нарушающей считается измененная запись.
+    """
+
+    unique_columns, not_null_columns = _column_constraints(metadata, table_name)
+    unique_columns = [ID_COLUMN] + [col_name for col_name in unique_columns
+                                    if col_name != ID_COLUMN]
+    seen = {col_name: {} for col_name in unique_columns}
+
+    def changed(i):
+        return changed_rows is None or i in changed_rows
+
+    for i, record in enumerate(table_data):
+        if changed(i):
+            for col_name in not_null_columns:
+                if record[col_name] is None:
+                    print(f'Ошибка: Столбец "{col_name}" не может быть null. '
+                          f'Запись: {record.to_dict()}')
+                    return False
+
+        for col_name in unique_columns:
+            value = record[col_name]
+            if value is None:
+                continue
+            j = seen[col_name].setdefault(value, i)
+            if j == i:
+                continue
+
+            # Нарушает ограничение измененная запись, а не та, что уже
+            # хранила это значение
+            offender, other = (j, i) if changed(j) and not changed(i) else (i, j)
+            print(f'Ошибка: Значение {value!r} столбца "{col_name}" уже есть '
+                  f'в записи ID={table_data[other][ID_COLUMN]}. '
+                  f'Запись: {table_data[offender].to_dict()}')
+            return False
+
+    return True
+
+
+def _violation(message: str, record) -> _ConstraintViolation:
+    """Возвращает ошибку нарушения ограничения с нарушающей записью."""
+
+    return _ConstraintViolation(f"{message}. Запись: {record.to_dict()}")
+
+
+def _existing_id(metadata: dict, table_name: str, column: str, value):
+    """
+    Возвращает ID живой записи с таким значением уникального столбца
+    (или ID) или None.
+    """
+
+    if column == ID_COLUMN:
+        condition = {ID_COLUMN: value}
+        found = list(filter_records(iter_table_data(table_name, condition),
+                                    condition))
+        return value if live_records(metadata, table_name, found) else None
+
+    existing_id = find_by_unique_value(table_name, column, value)
+    if existing_id is not None and _indexed_record_gone(
+            metadata, table_name, existing_id, column, value):
+        return None
+    return existing_id
+
+
+def _check_columns(metadata: dict, table_name: str, clauses) -> bool:
+    """Проверяет, что столбцы условий существуют в таблице."""
+
+    columns = _table_columns(metadata, table_name)
+    for clause in clauses:
+        for column in clause or {}:
+            if column not in columns:
+                print(f'Ошибка: Столбец "{column}" не существует в таблице. '
+                      f'Допустимые столбцы: {", ".join(sorted(columns))}')
+                return False
+    return True
+
+
+@handle_db_errors
+def update_streaming(metadata: dict, table_name: str, set_clause: dict,
+                     where_clause: dict, changes: dict = None) -> int:
+    """
+    Обновляет записи потоково: переписываются только сегменты
+    с подходящими записями (большие таблицы сканируются в пуле процессов),
+    по одному сегменту за раз, поэтому расход памяти не зависит от размера
+    таблицы.
+
+    Ограничения проверяются по ходу: not null - для каждой измененной
+    записи, unique - по числу измененных записей (одно значение нельзя
+    присвоить нескольким) и по индексу. При нарушении новая версия
+    таблицы не сохраняется.
+
+    Args:
+        changes: Словарь для измененных записей {ID: запись} (для
+            представлений) или None
+
+    Returns:
+        Число обновленных записей (None при ошибке)
+    """
+
+    if not _check_columns(metadata, table_name, (set_clause, where_clause)):
+        return None
+
+    unique_columns, not_null_columns = _column_constraints(metadata, table_name)
+    null_columns = [column for column, value in set_clause.items()
+                    if value is None and column in not_null_columns]
+    unique_set = [column for column, value in set_clause.items()
+                  if value is not None
+                  and (column == ID_COLUMN or column in unique_columns)]
+    matches = record_matcher(_table_columns(metadata, table_name), where_clause)
+    updated_count = 0
+    first_record = None
+
+    def transform(records):
+        nonlocal updated_count, first_record
+
+        for record in live_records(metadata, table_name, records):
+            if matches(record):
+                new_record = record.copy()
+                for col, new_value in set_clause.items():
+                    new_record[col] = new_value
+
+                if new_record != record:
+                    if null_columns:
+                        raise _violation(f'Столбец "{null_columns[0]}" '
+                                         f'не может быть null', new_record)
+                    if unique_set and first_record is not None:
+                        raise _violation(
+                            f'Значение {set_clause[unique_set[0]]!r} столбца '
+                            f'"{unique_set[0]}" уже есть в записи '
+                            f'ID={first_record[ID_COLUMN]}', new_record)
+
+                    updated_count += 1
+                    if first_record is None:
+                        first_record = new_record
+                    if changes is not None:
+                        if new_record[ID_COLUMN] != record[ID_COLUMN]:
+                            changes.setdefault(record[ID_COLUMN], None)
+                        changes[new_record[ID_COLUMN]] = new_record
+                    record = new_record
+            yield record
+
+    def validate():
+        if not updated_count:
+            raise _Unchanged
+
+        # Единственная измененная запись сверяется с остальными по индексу
+        for col_name in unique_set:
+            value = set_clause[col_name]
+            existing_id = _existing_id(metadata, table_name, col_name, value)
+            if existing_id is not None and existing_id != first_record[ID_COLUMN]:
+                raise _violation(f'Значение {value!r} столбца "{col_name}" уже '
+                                 f'есть в записи ID={existing_id}', first_record)
+
+    try:
+        rewrite_table_data(table_name, transform, where_clause, validate)
+    except _Unchanged:
+        return 0
+    except _ConstraintViolation as e:
+        print(f"Ошибка: {e}")
+        print("Изменения отменены.")
+        return None
+    return updated_count
+
+
+@handle_db_errors
+@confirm_action("удаление записей из таблицы") 
+def delete_streaming(metadata: dict, table_name: str, where_clause: dict,
+                     changes: dict = None) -> int:
+    """
+    Удаляет записи потоково: по одному переписываются только сегменты
+    с подходящими записями, не загружая таблицу в память.
+
+    Args:
+        changes: Словарь для удаленных записей {ID: None} (для
+            представлений) или None
+
+    Returns:
+        Число удаленных записей (None при ошибке; при отмене
+        confirm_action возвращает metadata)
+    """
+
+    if not _check_columns(metadata, table_name, (where_clause,)):
+        return None
+
+    matches = record_matcher(_table_columns(metadata, table_name), where_clause)
+    deleted_count = 0
+
+    def transform(records):
+        nonlocal deleted_count
+
+        for record in live_records(metadata, table_name, records):
+            if matches(record):
+                deleted_count += 1
+                if changes is not None:
+                    changes[record[ID_COLUMN]] = None
+                continue
+            yield record
+
+    def validate():
+        if not deleted_count:
+            raise _Unchanged
+
+    try:
+        rewrite_table_data(table_name, transform, where_clause, validate)
+    except _Unchanged:
+        return 0
+    return deleted_count
+
+
 @handle_db_errors
 @confirm_action("удаление записей из таблицы") 
 def delete(table_data: list, where_clause: dict) -> list:
@@ -236,12 +694,12 @@ def delete(table_data: list, where_clause: dict) -> list:
     if not _validate_clause(table_data, where_clause):
         return table_data
 
+    matches = set(find_matches(table_data, where_clause))
     updated_data = []
     
-    for record in table_data:
-        record_copy = record.copy()
-        if not _matches_condition(record_copy, where_clause):
-            updated_data.append(record_copy)
+    for i, record in enumerate(table_data):
+        if i not in matches:
+            updated_data.append(record.copy())
     
     return updated_data
 
@@ -254,8 +712,197 @@ def info(metadata: dict, table_name: str) -> None:
         print(f'Ошибка: Таблица "{table_name}" не существует.')
         return
     
-    table_data = load_table_data(table_name)
-    
     print(f"Таблица: {table_name}")
     print(f"Столбцы: {', '.join(metadata[table_name])}")
-    print(f"Количество записей: {len(table_data)}")
\ No newline at end of file
+    print(f"Количество записей: {count_table_records(table_name)}")
+
+    storage_info = get_table_storage_info(table_name)
+    ratio = storage_info["raw_size"] / storage_info["file_size"] \
+        if storage_info["file_size"] else 1.0
+    print(f"Формат хранения: {storage_info['format']} "
+          f"(сегментов: {storage_info['segments']})")
+    print(f"Размер на диске: {storage_info['file_size']} байт "
+          f"(без сжатия: {storage_info['raw_size']} байт, "
+          f"степень сжатия: {ratio:.2f}x)")
+
+
+@handle_db_errors
+def set_storage(metadata: dict, table_name: str, storage_format: str) -> None:
+    """Переводит таблицу в другой формат хранения (сжатие/компактный JSON)."""
+
+    if table_name not in metadata:
+        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        return
+
+    storage_format = storage_format.lower()
+    if storage_format not in STORAGE_FORMATS:
+        print(f"Некорректное значение: '{storage_format}'. "
+              f"Допустимые форматы: {', '.join(STORAGE_FORMATS)}")
+        return
+
+    table_data = load_table_data(table_name)
+    save_table_data(table_name, table_data, storage_format, previous=table_data)
+    print(f'Формат хранения таблицы "{table_name}" изменен на {storage_format}.')
+
+
+@handle_db_errors
+def set_ttl(metadata: dict, table_name: str, column: str) -> dict:
+    """
+    Назначает столбец срока жизни записей таблицы (или отключает срок
+    жизни аргументом off). Столбец должен быть типа int.
+    """
+
+    schema = [_parse_column_def(col_def) for col_def in metadata[table_name]]
+    disable = column.lower() == TTL_OFF
+
+    if not disable:
+        column_types = {col_name: col_type for col_name, col_type, _ in schema}
+        if column not in column_types:
+            print(f'Ошибка: Столбец "{column}" не существует в таблице.')
+            return metadata
+        if column_types[column] != TYPE_INT:
+            print(f'Ошибка: Столбец срока жизни должен быть типа {TYPE_INT}.')
+            return metadata
+
+    table_columns = []
+    for col_name, col_type, modifiers in schema:
+        modifiers = [modifier for modifier in modifiers if modifier != MODIFIER_TTL]
+        if not disable and col_name == column:
+            modifiers.append(MODIFIER_TTL)
+        table_columns.append(COLUMN_TYPE_SEPARATOR.join(
+            [col_name, col_type, *modifiers]))
+
+    metadata[table_name] = table_columns
+    if disable:
+        # Без срока жизни ключи индексов не перепроверяются по записям, а
+        # ключи удаленных очисткой записей остались - индексы строятся заново
+        drop_table_indexes(table_name)
+        print(f'Срок жизни записей таблицы "{table_name}" отключен.')
+    else:
+        print(f'Срок жизни записей таблицы "{table_name}" задается '
+              f'столбцом "{column}".')
+    return metadata
+
+
+def _value_matches_type(value, expected_type: str) -> bool:
+    """Проверяет, что сохраненное значение имеет тип столбца."""
+
+    if expected_type == TYPE_INT:
+        return type(value) is int
+    if expected_type == TYPE_BOOL:
+        return type(value) is bool
+    return type(value) is str
+
+
+@handle_db_errors
+def check(metadata: dict, table_name: str) -> None:
+    """
+    Проверяет таблицу: соответствие записей схеме из метаданных,
+    уникальность ID, ограничения not null и unique, индексы,
+    контрольные суммы и служебные данные сегментов.
+    """
+
+    if table_name not in metadata:
+        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        return
+
+    schema = [_parse_column_def(col_def) for col_def in metadata[table_name]]
+    columns = tuple(col_name for col_name, _, _ in schema)
+    unique_columns, _ = _column_constraints(metadata, table_name)
+    ttl_column = expiry_column(metadata, table_name)
+    now = time.time()
+    seen_ids = set()
+    seen_values = {col_name: {} for col_name in unique_columns}
+    # Индекс содержит и истекшие записи (значение -> последний ID)
+    indexed_values = {col_name: {} for col_name in unique_columns}
+
+    def check_record(record):
+        record_id = record.get(ID_COLUMN)
+        if tuple(record.keys()) != columns:
+            return (f"Запись ID={record_id}: столбцы {', '.join(record.keys())} "
+                    f"не совпадают со схемой")
+
+        for col_name, col_type, modifiers in schema:
+            value = record[col_name]
+            if value is None:
+                if MODIFIER_NOT_NULL in modifiers:
+                    return f'Запись ID={record_id}: столбец "{col_name}" null'
+            elif not _value_matches_type(value, col_type):
+                return (f'Запись ID={record_id}: значение {value!r} '
+                        f'столбца "{col_name}" не типа {col_type}')
+
+        if record_id in seen_ids:
+            return f"Запись ID={record_id}: ID повторяется"
+        seen_ids.add(record_id)
+
+        # Истекшие записи ждут очистки и не мешают уникальности
+        expired = ttl_column is not None and record[ttl_column] is not None \
+            and record[ttl_column] <= now
+
+        for col_name, values in seen_values.items():
+            value = record[col_name]
+            if value is None:
+                continue
+            indexed_values[col_name][value] = record_id
+            if expired:
+                continue
+            existing_id = values.setdefault(value, record_id)
+            if existing_id != record_id:
+                return (f'Запись ID={record_id}: значение {value!r} столбца '
+                        f'"{col_name}" уже есть в записи ID={existing_id}')
+        return None
+
+    problems, rows = verify_table_data(table_name, check_record)
+    for col_name, values in indexed_values.items():
+        problems.extend(verify_table_index(table_name, col_name, values,
+                                           ttl_column is not None))
+
+    if not problems:
+        print(f'Таблица "{table_name}" в порядке (проверено записей: {rows}).')
+        return
+
+    print(f'В таблице "{table_name}" найдено проблем: {len(problems)} '
+          f'(проверено записей: {rows}).')
+    for problem in problems[:CHECK_MAX_PROBLEMS]:
+        print(f"  - {problem}")
+    if len(problems) > CHECK_MAX_PROBLEMS:
+        print(f"  ... и еще {len(problems) - CHECK_MAX_PROBLEMS}")
+
+
+@handle_db_errors
+def vacuum(metadata: dict, table_name: str) -> None:
+    """Переписывает таблицу компактно, выводя прогресс по сегментам."""
+
+    if table_name not in metadata:
+        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        return
+
+    def report_progress(done: int, total: int) -> None:
+        if done % VACUUM_PROGRESS_EVERY == 0 or done == total:
+            print(f"vacuum {table_name}: обработано сегментов {done}/{total}")
+
+    result = vacuum_table_data(table_name, report_progress)
+    print(f'Таблица "{table_name}" перезаписана: записей {result["rows"]}, '
+          f'сегментов {result["segments_before"]} -> {result["segments_after"]}, '
+          f'размер {result["bytes_before"]} -> {result["bytes_after"]} байт, '
+          f'удалено лишних файлов: {result["removed_files"]}.')
+
+
+@handle_db_errors
+def backup(target_dir: str) -> None:
+    """Создает резервную копию базы (копируются только измененные файлы)."""
+
+    result = create_backup(target_dir)
+    print(f'Резервная копия от {result["created"]} создана в "{target_dir}": '
+          f'файлов {result["files"]}, скопировано новых {result["copied"]} '
+          f'({result["bytes"]} байт).')
+
+
+@handle_db_errors
+@confirm_action("восстановление базы из резервной копии")
+def restore(source_dir: str, timestamp: str = None) -> None:
+    """Восстанавливает базу из резервной копии с проверкой контрольных сумм."""
+
+    result = restore_backup(source_dir, timestamp)
+    print(f'База восстановлена из резервной копии от {result["created"]} '
+          f'(файлов данных: {result["files"]}).')
@@ -1,54 +1,55 @@
-import shlex
-
-from prettytable import PrettyTable
-
+from ..decorators import log_command
 from .constants import (
-    KEYWORD_FROM,
-    # Ключевые слова
-    KEYWORD_INTO,
-    KEYWORD_SET,
-    KEYWORD_VALUES,
-    KEYWORD_WHERE,
-    # Минимальное количество аргументов
-    MIN_ARGS_CREATE_TABLE,
-    MIN_ARGS_DELETE,
-    MIN_ARGS_DROP_TABLE,
-    MIN_ARGS_INFO,
-    MIN_ARGS_INSERT,
-    MIN_ARGS_SELECT,
-    MIN_ARGS_UPDATE,
-    # Позиции аргументов
-    POS_COMMAND,
-    POS_CREATE_TABLE_NAME,
-    POS_DELETE_KEYWORD_FROM,
-    POS_DELETE_KEYWORD_WHERE,
-    POS_DELETE_TABLE_NAME,
-    POS_DELETE_WHERE_START,
-    POS_DROP_TABLE_NAME,
-    POS_FIRST_ARG,
-    POS_INFO_TABLE_NAME,
-    POS_INSERT_KEYWORD_INTO,
-    POS_INSERT_KEYWORD_VALUES,
-    POS_INSERT_TABLE_NAME,
-    POS_SELECT_KEYWORD_FROM,
-    POS_SELECT_KEYWORD_WHERE,
-    POS_SELECT_TABLE_NAME,
-    POS_SELECT_WHERE_START,
-    POS_UPDATE_KEYWORD_SET,
-    POS_UPDATE_TABLE_NAME,
+    DEFAULT_OUTPUT_FORMAT,
+    ID_COLUMN,
+    MUTATION_MEMORY_LIMIT,
+    OUTPUT_FORMATS,
+    TABLE_LOCK_COMMANDS,
 )
 from .core import (
+    backup,
+    check,
+    check_constraints,
+    coerce_set_clause,
     create_table,
+    create_view,
     delete,
+    delete_streaming,
     drop_table,
     info,
     insert,
     list_tables,
+    live_records,
+    restore,
     select,
+    select_ordered,
+    set_storage,
+    set_ttl,
     update,
+    update_streaming,
+    vacuum,
+)
+from .parser import bind_parameters, count_parameters, parse_statement
+from .render import render
+from .ttl import start_sweeper, sweeper_paused
+from .utils import (
+    append_table_record,
+    count_table_records,
+    delete_table_data,
+    get_table_memory_estimate,
+    load_metadata,
+    load_table_data,
+    load_views,
+    lock_table_data,
+    save_metadata,
+    save_table_data,
+    save_views,
+    table_scans_in_parallel,
 )
-from .parser import parse_set_clause, parse_values, parse_where_clause
-from .utils import load_metadata, load_table_data, save_metadata, save_table_data
+from .views import apply_changes, apply_insert, views_of
+
+_output_format = DEFAULT_OUTPUT_FORMAT
+_prepared_statements = {}
 
 
 def _print_help():
@@ -56,7 +57,10 @@ def _print_help():
     
     print("\n***Процесс работы с таблицей***")
     print("Функции:")
-    print("<command> create_table <имя_таблицы> <столбец1:тип> .. - создать таблицу")
+    print("<command> create_table <имя_таблицы> <столбец1:тип[:unique][:not_null]> .. "
+          "- создать таблицу")
+    print("<command> create materialized view <имя> as select from <имя_таблицы> "
+          "[where <условие>] - создать материализованное представление.")
     print("<command> list_tables - показать список всех таблиц")
     print("<command> drop_table <имя_таблицы> - удалить таблицу")
     print("<command> insert into <имя_таблицы> "
@@ -64,31 +68,45 @@ def _print_help():
     print("<command> select from <имя_таблицы> "
           "where <столбец> = <значение> - прочитать записи по условию.")
     print("<command> select from <имя_таблицы> - прочитать все записи.")
+    print("<command> select from <имя_таблицы> [where <условие>] "
+          "order by <столбец> [asc|desc] [limit <число>] "
+          "- прочитать записи по порядку.")
     print("<command> update <имя_таблицы> set <столбец1> = <новое_значение1> "
           "where <столбец_условия> = <значение_условия> - обновить запись.")
     print("<command> delete from <имя_таблицы> "
           "where <столбец> = <значение> - удалить запись.")
     print("<command> info <имя_таблицы> - вывести информацию о таблице.")
+    print("<command> check <имя_таблицы> "
+          "- проверить целостность таблицы.")
+    print("<command> vacuum <имя_таблицы> "
+          "- переписать таблицу компактно и перестроить служебные данные.")
+    print("<command> set_storage <имя_таблицы> <json|compact|gzip|lzma|zstd> "
+          "- изменить формат хранения (сжатие) таблицы.")
+    print("<command> set_ttl <имя_таблицы> <столбец|off> "
+          "- задать столбец срока жизни записей (время истечения, int).")
+    print("<command> output <table|tsv|csv|jsonl|none> "
+          "- формат вывода результатов select.")
+    print("<command> prepare <имя> as <команда с параметрами ?> "
+          "- подготовить команду (insert/select/update/delete).")
+    print("<command> execute <имя> (<значение1>, ...) "
+          "- выполнить подготовленную команду.")
+    print("<command> backup <каталог> "
+          "- создать резервную копию (только измененные файлы).")
+    print("<command> restore <каталог> [at <ГГГГ-ММ-ДДTЧЧ:ММ:СС>] "
+          "- восстановить базу из резервной копии.")
     print("<command> exit - выход из программы")
     print("<command> help - справочная информация")
     print()
 
 
 def _print_table(table_data: list):
-    """Выводит данные таблицы в формате PrettyTable."""
+    """Выводит данные таблицы в текущем формате вывода (команда output)."""
 
     if not table_data:
         print("Нет данных для отображения.")
         return
     
-    headers = list(table_data[0].keys())
-    table = PrettyTable(headers)
-    
-    for record in table_data:
-        row = [record[header] for header in headers]
-        table.add_row(row)
-    
-    print(table)
+    render(table_data, _output_format)
 
 
 def _table_exists(metadata: dict, table_name: str) -> bool:
@@ -107,16 +125,11 @@ def _ensure_table_exists(metadata: dict, table_name: str) -> bool:
     return True
 
 
-def _handle_create_table(args: list, metadata: dict) -> dict:
+def _handle_create_table(statement, metadata: dict) -> dict:
     """Обрабатывает команду create_table."""
 
-    if len(args) < MIN_ARGS_CREATE_TABLE:
-        print("Использование: create_table <имя_таблицы> <столбец1:тип> ...")
-        return metadata
-    
-    table_name = args[POS_CREATE_TABLE_NAME]
-    columns = args[POS_FIRST_ARG + 1:]
-    metadata = create_table(metadata, table_name, columns)
+    table_name = statement.table
+    metadata = create_table(metadata, table_name, list(statement.values))
     
     if _table_exists(metadata, table_name):
         save_metadata(metadata)
@@ -124,205 +137,384 @@ def _handle_create_table(args: list, metadata: dict) -> dict:
     return metadata
 
 
-def _handle_drop_table(args: list, metadata: dict) -> dict:
-    """Обрабатывает команду drop_table."""
+def _ensure_writable(views: dict, table_name: str) -> bool:
+    """Проверяет, что таблица не материализованное представление."""
+
+    if table_name in views:
+        print(f'Ошибка: Представление "{table_name}" доступно только для '
+              f'чтения (оно обновляется по таблице "{views[table_name]["table"]}").')
+        return False
+
+    return True
+
+
+def _handle_create_view(statement, metadata: dict) -> None:
+    """Обрабатывает команду create materialized view."""
+
+    views = load_views()
+    if create_view(metadata, views, statement.argument, statement.statement):
+        save_metadata(metadata)
+        save_views(views)
+
 
-    if len(args) != MIN_ARGS_DROP_TABLE:
-        print("Использование: drop_table <имя_таблицы>")
+def _handle_drop_table(statement, metadata: dict) -> dict:
+    """Обрабатывает команду drop_table (и удаление представления)."""
+
+    table_name = statement.table
+    views = load_views()
+    dependent = views_of(views, table_name)
+    if dependent:
+        print(f'Ошибка: По таблице "{table_name}" построены представления: '
+              f'{", ".join(dependent)}. Сначала удалите их.')
         return metadata
-    
-    table_name = args[POS_DROP_TABLE_NAME]
+
     old_len = len(metadata)
     metadata = drop_table(metadata, table_name)
     
     if len(metadata) < old_len:
-        save_table_data(table_name, [])
+        delete_table_data(table_name)
         save_metadata(metadata)
+        if views.pop(table_name, None) is not None:
+            save_views(views)
     
     return metadata
 
 
-def _handle_insert(args: list, metadata: dict) -> None:
+def _handle_insert(statement, metadata: dict) -> None:
     """Обрабатывает команду insert."""
 
-    if (len(args) < MIN_ARGS_INSERT or
-            args[POS_INSERT_KEYWORD_INTO].lower() != KEYWORD_INTO or
-            args[POS_INSERT_KEYWORD_VALUES].lower() != KEYWORD_VALUES):
-        usage = "Использование: insert into <имя_таблицы> "
-        usage += "values (<значение1>, <значение2>, ...)"
-        print(usage)
-        return
-    
-    table_name = args[POS_INSERT_TABLE_NAME]
-    
+    table_name = statement.table
     if not _ensure_table_exists(metadata, table_name):
         return
-    
-    # Значения начинаются после "values"
-    values_str = ' '.join(args[POS_INSERT_KEYWORD_VALUES + 1:])
-    values = parse_values(values_str)
-    
-    if not values:
-        usage = "Использование: insert into <имя_таблицы> "
-        usage += "values (<значение1>, <значение2>, ...)"
-        print(usage)
+
+    views = load_views()
+    if not _ensure_writable(views, table_name):
         return
     
-    updated_data = insert(metadata, table_name, values)
-    if updated_data:
-        save_table_data(table_name, updated_data)
+    new_record = insert(metadata, table_name, list(statement.values))
+    if new_record:
+        append_table_record(table_name, new_record)
+        apply_insert(views, table_name, new_record)
 
 
-def _handle_select(args: list, metadata: dict) -> None:
+def _handle_select(statement, metadata: dict) -> None:
     """Обрабатывает команду select."""
 
-    if len(args) < MIN_ARGS_SELECT or \
-            args[POS_SELECT_KEYWORD_FROM].lower() != KEYWORD_FROM:
-        
-        print("Использование: select from <имя_таблицы> [where <условие>]")
-        return
-    
-    table_name = args[POS_SELECT_TABLE_NAME]
+    table_name = statement.table
     if not _ensure_table_exists(metadata, table_name):
         return
     
-    table_data = load_table_data(table_name)
+    where_clause = statement.where
+
+    # Большие таблицы (в том числе select без условий - выгрузка) выводятся
+    # потоково, не загружаясь в память
+    if (statement.order_by is not None or statement.limit is not None
+            or _is_large(table_name)):
+        _select_ordered(statement, metadata)
+        return
+
+    # Сегменты, не подходящие под условие по зональным картам, не читаются
+    table_data = live_records(metadata, table_name,
+                              load_table_data(table_name, where_clause))
     if not table_data:
-        print(f'Таблица "{table_name}" пуста.')
+        if not where_clause or not count_table_records(table_name):
+            print(f'Таблица "{table_name}" пуста.')
         return
     
-    # Проверяем наличие условия WHERE
-    if len(args) > POS_SELECT_WHERE_START and \
-            args[POS_SELECT_KEYWORD_WHERE].lower() == KEYWORD_WHERE:
-
-        where_str = ' '.join(args[POS_SELECT_WHERE_START:])
-        where_clause = parse_where_clause(where_str)
-        
+    result_data = select(table_data, where_clause)
+    if not result_data:
         if not where_clause:
-            print("Использование: select from <имя_таблицы> [where <условие>]")
-            return
-        
-        result_data = select(table_data, where_clause)
-        if not result_data:
-            return
-    elif len(args) == MIN_ARGS_SELECT:
-        result_data = select(table_data)
-        if not result_data:
             print(f'Таблица "{table_name}" пуста.')
-            return
-    else:
-        print("Использование: select from <имя_таблицы> [where <условие>]")
         return
     
     _print_table(result_data)
 
 
-def _handle_update(args: list, metadata: dict) -> None:
-    """Обрабатывает команду update."""
+def _select_ordered(statement, metadata: dict) -> None:
+    """Выполняет select с order by и/или limit, выводя записи потоково."""
 
-    if len(args) < MIN_ARGS_UPDATE or \
-            args[POS_UPDATE_KEYWORD_SET].lower() != KEYWORD_SET \
-            or KEYWORD_WHERE not in args:
-        usage = "Использование: update <имя_таблицы> "
-        usage += "set <столбец>=<значение> where <условие>"
-        print(usage)
+    table_name = statement.table
+    records = select_ordered(metadata, table_name, statement.where,
+                             statement.order_by, statement.descending,
+                             statement.limit)
+    if records is None:
         return
-    
-    table_name = args[POS_UPDATE_TABLE_NAME]
+
+    if not render(records, _output_format):
+        if not statement.where and not count_table_records(table_name):
+            print(f'Таблица "{table_name}" пуста.')
+
+
+def _is_large(table_name: str) -> bool:
+    """
+    Проверяет, что таблицу нужно обрабатывать по сегментам, не загружая
+    в память: ее сегменты сканируются в пуле процессов (от
+    PARALLEL_SCAN_THRESHOLD записей) или она не помещается в память
+    (см. MUTATION_MEMORY_LIMIT). Обе проверки не читают однофайловую
+    таблицу.
+    """
+
+    return (table_scans_in_parallel(table_name)
+            or get_table_memory_estimate(table_name) > MUTATION_MEMORY_LIMIT)
+
+
+def _handle_update(statement, metadata: dict) -> None:
+    """Обрабатывает команду update."""
+
+    table_name = statement.table
     if not _ensure_table_exists(metadata, table_name):
         return
-    
-    try:
-        set_idx = args.index("set")
-        where_idx = args.index("where")
-    except ValueError:
-        print("Некорректный синтаксис команды update.")
-        usage = "Использование: update <имя_таблицы> "
-        usage += "set <столбец>=<значение> where <условие>"
-        print(usage)
-        return
-    
-    set_str = ' '.join(args[set_idx + 1:where_idx])
-    where_str = ' '.join(args[where_idx + 1:])
-    
-    set_clause = parse_set_clause(set_str)
-    if not set_clause:
-        usage = "Использование: update <имя_таблицы> "
-        usage += "set <столбец>=<значение> where <условие>"
-        print(usage)
+
+    views = load_views()
+    if not _ensure_writable(views, table_name):
         return
-    
-    where_clause = parse_where_clause(where_str)
-    if not where_clause:
-        usage = "Использование: update <имя_таблицы> "
-        usage += "set <столбец>=<значение> where <условие>"
-        print(usage)
+
+    if _is_large(table_name):
+        _update_streaming(statement, metadata, views)
         return
     
-    table_data = load_table_data(table_name)
+    # Истекшие записи не обновляются и удаляются при сохранении
+    stored_data = load_table_data(table_name)
+    table_data = live_records(metadata, table_name, stored_data)
     if not table_data:
         print(f'Таблица "{table_name}" пуста.')
         return
     
-    updated_data = update(table_data, set_clause, where_clause)
+    set_clause = coerce_set_clause(metadata, table_name, statement.set_clause)
+    if set_clause is None:
+        return
+    
+    updated_data = update(table_data, set_clause, statement.where)
     
     if updated_data != table_data:
-        save_table_data(table_name, updated_data)
-        updated_count = sum(1 for i in range(len(table_data))
-                            if table_data[i] != updated_data[i])
+        changed_rows = {i for i, (old, new)
+                        in enumerate(zip(table_data, updated_data)) if old != new}
+        if not check_constraints(metadata, table_name, updated_data,
+                                 changed_rows):
+            print("Изменения отменены.")
+            return
+        save_table_data(table_name, updated_data, previous=stored_data)
+        # Запись со смененным ID исчезает из представлений под прежним ID
+        changes = {table_data[i][ID_COLUMN]: None for i in changed_rows
+                   if table_data[i][ID_COLUMN] != updated_data[i][ID_COLUMN]}
+        changes.update((updated_data[i][ID_COLUMN], updated_data[i])
+                       for i in sorted(changed_rows))
+        apply_changes(views, table_name, changes)
+        updated_count = len(changed_rows)
         message = f'Записей в таблице "{table_name}" успешно обновлено: '
         message += f'{updated_count}.'
         print(message)
 
 
-def _handle_delete(args: list, metadata: dict) -> None:
-    """Обрабатывает команду delete."""
+def _update_streaming(statement, metadata: dict, views: dict) -> None:
+    """Выполняет update большой таблицы потоково, без загрузки в память."""
 
-    if (len(args) < MIN_ARGS_DELETE or
-            args[POS_DELETE_KEYWORD_FROM].lower() != KEYWORD_FROM or
-            args[POS_DELETE_KEYWORD_WHERE].lower() != KEYWORD_WHERE):
-        print("Использование: delete from <имя_таблицы> where <условие>")
+    table_name = statement.table
+    set_clause = coerce_set_clause(metadata, table_name, statement.set_clause)
+    if set_clause is None:
         return
-    
-    table_name = args[POS_DELETE_TABLE_NAME]
+
+    changes = {} if views_of(views, table_name) else None
+    updated_count = update_streaming(metadata, table_name, set_clause,
+                                     statement.where, changes)
+    if updated_count:
+        apply_changes(views, table_name, changes or {})
+        print(f'Записей в таблице "{table_name}" успешно обновлено: '
+              f'{updated_count}.')
+
+
+def _delete_streaming(statement, metadata: dict, views: dict) -> None:
+    """Выполняет delete большой таблицы потоково, без загрузки в память."""
+
+    table_name = statement.table
+    changes = {} if views_of(views, table_name) else None
+    deleted_count = delete_streaming(metadata, table_name, statement.where,
+                                     changes)
+
+    # При отмене confirm_action возвращает metadata, при ошибке - None
+    if isinstance(deleted_count, int) and deleted_count:
+        apply_changes(views, table_name, changes or {})
+        print(f'Записей из таблицы "{table_name}" успешно удалено: '
+              f'{deleted_count}.')
+
+
+def _handle_delete(statement, metadata: dict) -> None:
+    """Обрабатывает команду delete."""
+
+    table_name = statement.table
     if not _ensure_table_exists(metadata, table_name):
         return
-    
-    where_str = ' '.join(args[POS_DELETE_WHERE_START:])
-    where_clause = parse_where_clause(where_str)
-    
-    if not where_clause:
-        print("Использование: delete from <имя_таблицы> where <условие>")
+
+    views = load_views()
+    if not _ensure_writable(views, table_name):
+        return
+
+    if _is_large(table_name):
+        _delete_streaming(statement, metadata, views)
         return
     
-    table_data = load_table_data(table_name)
+    # Истекшие записи не обновляются и удаляются при сохранении
+    stored_data = load_table_data(table_name)
+    table_data = live_records(metadata, table_name, stored_data)
     if not table_data:
         print(f'Таблица "{table_name}" пуста.')
         return
     
     original_count = len(table_data)
-    updated_data = delete(table_data, where_clause)
+    updated_data = delete(table_data, statement.where)
     deleted_count = original_count - len(updated_data)
     
     if deleted_count > 0:
-        save_table_data(table_name, updated_data)
+        save_table_data(table_name, updated_data, previous=stored_data)
+        kept_ids = {record[ID_COLUMN] for record in updated_data}
+        apply_changes(views, table_name, {
+            record[ID_COLUMN]: None for record in table_data
+            if record[ID_COLUMN] not in kept_ids})
         message = f'Записей из таблицы "{table_name}" успешно удалено: '
         message += f'{deleted_count}.'
         print(message)
 
 
-def _handle_info(args: list, metadata: dict) -> None:
+def _handle_info(statement, metadata: dict) -> None:
     """Обрабатывает команду info."""
 
-    if len(args) != MIN_ARGS_INFO:
-        print("Использование: info <имя_таблицы>")
+    if _ensure_table_exists(metadata, statement.table):
+        info(metadata, statement.table)
+
+
+def _handle_check(statement, metadata: dict) -> None:
+    """Обрабатывает команду check."""
+
+    if _ensure_table_exists(metadata, statement.table):
+        check(metadata, statement.table)
+
+
+def _handle_vacuum(statement, metadata: dict) -> None:
+    """Обрабатывает команду vacuum."""
+
+    if _ensure_table_exists(metadata, statement.table):
+        vacuum(metadata, statement.table)
+
+
+def _handle_set_storage(statement, metadata: dict) -> None:
+    """Обрабатывает команду set_storage."""
+
+    if _ensure_table_exists(metadata, statement.table):
+        set_storage(metadata, statement.table, statement.argument)
+
+
+def _handle_set_ttl(statement, metadata: dict) -> None:
+    """Обрабатывает команду set_ttl."""
+
+    if not _ensure_table_exists(metadata, statement.table):
         return
-    
-    table_name = args[POS_INFO_TABLE_NAME]
-    if _table_exists(metadata, table_name):
-        info(metadata, table_name)
+
+    metadata = set_ttl(metadata, statement.table, statement.argument)
+    if metadata is not None:
+        save_metadata(metadata)
+        start_sweeper(metadata)
+
+
+def _handle_output(statement) -> None:
+    """Обрабатывает команду output (без аргумента выводит текущий формат)."""
+
+    global _output_format
+
+    output_format = statement.argument
+    if output_format is None:
+        print(f"Текущий формат вывода: {_output_format}")
+        return
+
+    if output_format not in OUTPUT_FORMATS:
+        print(f"Некорректное значение: '{output_format}'. "
+              f"Допустимые форматы: {', '.join(OUTPUT_FORMATS)}")
+        return
+
+    _output_format = output_format
+    print(f"Формат вывода: {output_format}")
+
+
+def _handle_prepare(statement) -> None:
+    """Обрабатывает команду prepare: сохраняет разобранную команду."""
+
+    _prepared_statements[statement.argument] = statement.statement
+    print(f'Команда "{statement.argument}" подготовлена, параметров: '
+          f'{count_parameters(statement.statement)}.')
+
+
+def _resolve_execute(statement):
+    """Возвращает подготовленную команду с подставленными параметрами."""
+
+    prepared = _prepared_statements.get(statement.argument)
+    if prepared is None:
+        raise ValueError(f'Подготовленная команда "{statement.argument}" '
+                         f'не найдена.')
+    return bind_parameters(prepared, statement.values)
+
+
+_TABLE_HANDLERS = {
+    "create_table": _handle_create_table,
+    "drop_table": _handle_drop_table,
+    "create_view": _handle_create_view,
+    "insert": _handle_insert,
+    "select": _handle_select,
+    "update": _handle_update,
+    "delete": _handle_delete,
+    "info": _handle_info,
+    "check": _handle_check,
+    "vacuum": _handle_vacuum,
+    "set_storage": _handle_set_storage,
+    "set_ttl": _handle_set_ttl,
+}
+
+
+@log_command
+def _execute(statement) -> bool:
+    """
+    Выполняет разобранную команду.
+
+    Returns:
+        False, если нужно завершить программу
+    """
+
+    command = statement.command
+
+    if command == "exit":
+        print("Выход из программы.")
+        return False
+
+    if command == "help":
+        _print_help()
+    elif command == "output":
+        _handle_output(statement)
+    elif command == "prepare":
+        _handle_prepare(statement)
+    elif command == "backup":
+        backup(statement.argument)
+    elif command == "restore":
+        restore(statement.argument, *statement.values)
+    elif command == "execute":
+        try:
+            prepared = _resolve_execute(statement)
+        except ValueError as e:
+            print(e)
+            return True
+        return _execute(prepared)
     else:
-        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        # Метаданные читаются только для команд, которым они нужны
+        metadata = load_metadata()
+        start_sweeper(metadata)
+
+        if command == "list_tables":
+            list_tables(metadata, load_views())
+        elif command in TABLE_LOCK_COMMANDS and statement.table in metadata:
+            # Проверка ограничений и запись - под блокировкой таблицы
+            with lock_table_data(statement.table):
+                _TABLE_HANDLERS[command](statement, metadata)
+        else:
+            _TABLE_HANDLERS[command](statement, metadata)
+
+    return True
 
 
 def run():
@@ -332,56 +524,24 @@ def run():
     
     while True:
         try:
-            metadata = load_metadata()
             user_input = input(">>>Введите команду: ").strip()
             
-            if user_input.lower() == "exit":
-                print("Выход из программы.")
-                break
-            
-            if not user_input:
-                continue
-            
             try:
-                args = shlex.split(user_input)
+                statement = parse_statement(user_input)
             except ValueError as e:
-                print(f"Некорректный ввод: {e}. Попробуйте снова.")
+                print(e)
                 continue
             
-            command = args[POS_COMMAND].lower()
-            
-            if command == "create_table":
-                metadata = _handle_create_table(args, metadata)
-            
-            elif command == "drop_table":
-                metadata = _handle_drop_table(args, metadata)
-            
-            elif command == "list_tables":
-                list_tables(metadata)
-            
-            elif command == "insert":
-                _handle_insert(args, metadata)
-            
-            elif command == "select":
-                _handle_select(args, metadata)
-            
-            elif command == "update":
-                _handle_update(args, metadata)
-            
-            elif command == "delete":
-                _handle_delete(args, metadata)
-            
-            elif command == "info":
-                _handle_info(args, metadata)
-            
-            elif command == "help":
-                _print_help()
+            if statement is None:
+                continue
             
-            else:
-                print(f"Неизвестная команда: {command}")
+            # Фоновая очистка TTL не работает во время выполнения команды
+            with sweeper_paused():
+                if not _execute(statement):
+                    break
                 
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
             print("\nВыход из программы.")
             break
         except Exception as e:
-            print(f"Произошла ошибка: {e}")
\ No newline at end of file
+            print(f"Произошла ошибка: {e}")
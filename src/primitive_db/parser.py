@@ -1,141 +1,501 @@
 import re
+from collections import namedtuple
+from functools import lru_cache
 
 from .constants import (
-    ASSIGNMENT_PATTERN,
     BOOL_FALSE_VALUES,
     BOOL_TRUE_VALUES,
     CLOSE_PAREN,
     COMMA,
+    INTEGER_PATTERN,
+    KEYWORD_AS,
+    KEYWORD_ASC,
+    KEYWORD_AT,
+    KEYWORD_BY,
+    KEYWORD_DESC,
+    KEYWORD_FROM,
+    KEYWORD_INTO,
+    KEYWORD_LIMIT,
+    KEYWORD_MATERIALIZED,
+    KEYWORD_ORDER,
+    KEYWORD_SELECT,
+    KEYWORD_SET,
+    KEYWORD_VALUES,
+    KEYWORD_VIEW,
+    KEYWORD_WHERE,
+    NULL_VALUE,
+    OP_EQ,
     OPEN_PAREN,
-    QUOTE_DOUBLE,
-    QUOTE_SINGLE,
-    SPACE,
+    PREPARABLE_COMMANDS,
+    QUOTE_CHARS,
+    STATEMENT_CACHE_SIZE,
+    TOKEN_NUMBER,
+    TOKEN_OPERATOR,
+    TOKEN_PARAM,
+    TOKEN_PATTERN,
+    TOKEN_PUNCT,
+    TOKEN_STRING,
+    TOKEN_WORD,
 )
 
+# Условие WHERE для одного столбца: оператор сравнения и значение
+Condition = namedtuple("Condition", ["operator", "value"])
 
-def strip_quotes(value: str) -> str:
-    """Убирает кавычки со строкового значения."""
-    
-    value = value.strip()
-    if (value.startswith(QUOTE_DOUBLE) and value.endswith(QUOTE_DOUBLE)) or \
-       (value.startswith(QUOTE_SINGLE) and value.endswith(QUOTE_SINGLE)):
-        return value[1:-1]
-    
-    return value
-
-def parse_assignment(assignment: str) -> tuple:
-    """Парсит одно присваивание вида 'column = value'."""
-    
-    match = re.match(ASSIGNMENT_PATTERN, assignment, re.IGNORECASE)
-    
-    if not match:
-        raise ValueError(f'Некорректное присваивание: "{assignment}". '
-                         f'Ожидается формат: столбец = значение')
-    
-    column = match.group(1)
-    value = match.group(2).strip()
-    
-    if value.lower() in BOOL_TRUE_VALUES:
-        value = True
-    elif value.lower() in BOOL_FALSE_VALUES:
-        value = False
-    else: 
-        value = strip_quotes(value)
-
-    return column, value
-
-def parse_where_clause(where_str: str) -> dict:
-    """Парсит условие WHERE."""
-    
-    if not where_str:
-        return {}
-    
-    try:
-        column, value = parse_assignment(where_str)
-        return {column: value}
-    except ValueError as e:
-        print(f'Ошибка в условии WHERE: {e}')
-        return None
+# Токен команды: вид (TOKEN_*) и значение
+Token = namedtuple("Token", ["kind", "value"])
 
-def parse_set_clause(set_str: str) -> dict:
-    """Парсит условие SET."""
-    
-    if not set_str:
-        return {}
-    
-    result = {}
-    
-    try:
-        column, value = parse_assignment(set_str)
-        result[column] = value
-    except ValueError as e:
-        print(f'Ошибка в условии SET: {e}')
-        return None
-    
-    return result
-
-def parse_values(values_str: str) -> list:
-    """Парсит строку значений для INSERT."""
-    
-    if not (values_str.startswith(OPEN_PAREN) and values_str.endswith(CLOSE_PAREN)):
-        print("Ошибка: Значения должны быть заключены в скобки.")
-        return None
-    
-    content = values_str[1:-1].strip()
-    
-    if not content:
-        return []
-    
-    try:
-        # Используем кастомный парсинг
+# Параметр ? подготовленной команды (номер по порядку, с нуля)
+Param = namedtuple("Param", ["index"])
+
+# Разобранная команда. Заполняются только поля, нужные команде:
+#   table      - имя таблицы
+#   values     - значения insert, определения столбцов create_table,
+#                параметры execute, время восстановления restore
+#   set_clause - {столбец: значение} для update
+#   where      - {столбец: Condition} или None
+#   argument   - формат (set_storage, output), столбец (set_ttl),
+#                имя (prepare, execute, create_view)
+#                или каталог резервной копии (backup, restore)
+#   statement  - подготавливаемая команда (prepare) или select
+#                представления (create_view)
+#   order_by   - столбец сортировки select или None
+#   descending - сортировка по убыванию (order by ... desc)
+#   limit      - максимальное число записей select или None
+Statement = namedtuple(
+    "Statement",
+    ["command", "table", "values", "set_clause", "where", "argument", "statement",
+     "order_by", "descending", "limit"],
+    defaults=(None, (), None, None, None, None, None, False, None),
+)
+
+_TOKEN_RE = re.compile(TOKEN_PATTERN)
+_INTEGER_RE = re.compile(INTEGER_PATTERN)
+
+_USAGE = {
+    "create_table": ("create_table <имя_таблицы> "
+                     "<столбец1:тип[:unique][:not_null]> ..."),
+    "drop_table": "drop_table <имя_таблицы>",
+    "create": ("create materialized view <имя> as select from <имя_таблицы> "
+               "[where <условие>]"),
+    "list_tables": "list_tables",
+    "insert": "insert into <имя_таблицы> values (<значение1>, <значение2>, ...)",
+    "select": ("select from <имя_таблицы> [where <условие>] "
+               "[order by <столбец> [asc|desc]] [limit <число>]"),
+    "update": "update <имя_таблицы> set <столбец>=<значение> where <условие>",
+    "delete": "delete from <имя_таблицы> where <условие>",
+    "info": "info <имя_таблицы>",
+    "check": "check <имя_таблицы>",
+    "vacuum": "vacuum <имя_таблицы>",
+    "set_storage": "set_storage <имя_таблицы> <json|compact|gzip|lzma|zstd>",
+    "set_ttl": "set_ttl <имя_таблицы> <столбец|off>",
+    "output": "output <table|tsv|csv|jsonl|none>",
+    "prepare": "prepare <имя> as <insert|select|update|delete с параметрами ?>",
+    "execute": "execute <имя> [(<значение1>, <значение2>, ...)]",
+    "backup": "backup <каталог>",
+    "restore": "restore <каталог> [at <ГГГГ-ММ-ДДTЧЧ:ММ:СС>]",
+    "help": "help",
+    "exit": "exit",
+}
+
+
+def tokenize(text: str) -> list:
+    """Разбивает команду на токены за один проход."""
+
+    tokens = []
+    position = 0
+    length = len(text.rstrip())
+
+    while position < length:
+        match = _TOKEN_RE.match(text, position)
+
+        if not match or match.end() == position:
+            char = text[position:].lstrip()[:1]
+            if char in QUOTE_CHARS:
+                raise ValueError("Некорректный ввод: незакрытые кавычки.")
+            raise ValueError(f"Некорректный ввод: неожиданный символ '{char}'.")
+
+        kind = match.lastgroup
+        value = match.group(kind)
+
+        if kind == TOKEN_STRING:
+            value = value[1:-1]
+        elif kind == TOKEN_WORD and _INTEGER_RE.fullmatch(value):
+            kind, value = TOKEN_NUMBER, int(value)
+
+        tokens.append(Token(kind, value))
+        position = match.end()
+
+    return tokens
+
+
+class _TokenStream:
+    """Курсор по списку токенов одной команды."""
+
+    def __init__(self, tokens: list, command: str):
+        self.tokens = tokens
+        self.position = 0
+        self.command = command
+        self.param_count = 0
+
+    def error(self) -> ValueError:
+        """Возвращает ошибку с подсказкой по синтаксису команды."""
+
+        return ValueError(f"Использование: {_USAGE[self.command]}")
+
+    def at_end(self) -> bool:
+        return self.position >= len(self.tokens)
+
+    def peek(self):
+        return None if self.at_end() else self.tokens[self.position]
+
+    def next(self) -> Token:
+        if self.at_end():
+            raise self.error()
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def is_keyword(self, keyword: str) -> bool:
+        token = self.peek()
+        return (token is not None and token.kind == TOKEN_WORD
+                and token.value.lower() == keyword)
+
+    def expect_keyword(self, keyword: str) -> None:
+        if not self.is_keyword(keyword):
+            raise self.error()
+        self.position += 1
+
+    def expect_punct(self, punct: str) -> None:
+        token = self.next()
+        if token.kind != TOKEN_PUNCT or token.value != punct:
+            raise self.error()
+
+    def name(self) -> str:
+        """Читает имя (таблицы, столбца, формата)."""
+
+        token = self.next()
+        if token.kind not in (TOKEN_WORD, TOKEN_STRING):
+            raise self.error()
+        return str(token.value)
+
+    def literal(self, convert_bool: bool = True):
+        """
+        Читает значение: строку в кавычках, целое число, bool, null (None),
+        слово или параметр ? (для prepare).
+        """
+
+        token = self.next()
+
+        if token.kind == TOKEN_PARAM:
+            param = Param(self.param_count)
+            self.param_count += 1
+            return param
+        if token.kind in (TOKEN_STRING, TOKEN_NUMBER):
+            return token.value
+        if token.kind != TOKEN_WORD:
+            raise self.error()
+
+        lowered = token.value.lower()
+        if lowered == NULL_VALUE:
+            return None
+        if convert_bool and lowered in BOOL_TRUE_VALUES:
+            return True
+        if convert_bool and lowered in BOOL_FALSE_VALUES:
+            return False
+        return token.value
+
+    def literal_list(self, convert_bool: bool = True) -> tuple:
+        """Читает список значений в скобках: (a, b, ...)."""
+
+        self.expect_punct(OPEN_PAREN)
         values = []
-        i = 0
-        n = len(content)
-        
-        while i < n:
-            # Пропускаем пробелы
-            while i < n and content[i] == SPACE:
-                i += 1
-            
-            if i >= n:
-                break
-            
-            # Обработка значения
-            if content[i] in [QUOTE_DOUBLE, QUOTE_SINGLE]:
-                # Строковое значение в кавычках
-                quote_char = content[i]
-                i += 1
-                start = i
-                
-                # Ищем закрывающую кавычку
-                while i < n and content[i] != quote_char:
-                    i += 1
-                
-                if i >= n:
-                    print("Ошибка: Незакрытые кавычки.")
-                    return None
-                
-                value = content[start:i]
-                i += 1  # Пропускаем закрывающую кавычку
-            else:
-                # Значение без кавычек (число, true, false)
-                start = i
-                while i < n and content[i] != COMMA:
-                    i += 1
-                
-                value = content[start:i].strip()
-            
-            values.append(value)
-            
-            # Пропускаем запятую и пробелы
-            while i < n and content[i] != COMMA:
-                i += 1
-            
-            if i < n and content[i] == COMMA:
-                i += 1  # Пропускаем запятую
-        
-        return values
-        
-    except Exception as e:
-        print(f'Ошибка парсинга значений: {e}')
-        return None
\ No newline at end of file
+
+        while True:
+            values.append(self.literal(convert_bool))
+            token = self.next()
+            if token == Token(TOKEN_PUNCT, CLOSE_PAREN):
+                return tuple(values)
+            if token != Token(TOKEN_PUNCT, COMMA):
+                raise self.error()
+
+    def condition(self) -> dict:
+        """Читает условие WHERE: <столбец> <оператор> <значение>."""
+
+        column = self.name()
+        token = self.next()
+        if token.kind != TOKEN_OPERATOR:
+            raise self.error()
+        return {column: Condition(token.value, self.literal())}
+
+    def count(self) -> int:
+        """Читает неотрицательное целое число (для limit)."""
+
+        token = self.next()
+        if token.kind != TOKEN_NUMBER or token.value < 0:
+            raise self.error()
+        return token.value
+
+    def assignments(self) -> dict:
+        """Читает присваивания SET: <столбец> = <значение>[, ...]."""
+
+        result = {}
+
+        while True:
+            column = self.name()
+            if self.next() != Token(TOKEN_OPERATOR, OP_EQ):
+                raise self.error()
+            result[column] = self.literal()
+
+            if self.peek() != Token(TOKEN_PUNCT, COMMA):
+                return result
+            self.position += 1
+
+    def finish(self, statement: Statement) -> Statement:
+        """Проверяет, что после команды нет лишних токенов."""
+
+        if not self.at_end():
+            raise self.error()
+        return statement
+
+
+def _parse_create_table(stream: _TokenStream) -> Statement:
+    table = stream.name()
+    columns = []
+
+    while not stream.at_end():
+        if stream.peek() == Token(TOKEN_PUNCT, COMMA):
+            stream.position += 1
+            continue
+        columns.append(stream.name())
+
+    if not columns:
+        raise stream.error()
+    return Statement("create_table", table, tuple(columns))
+
+
+def _parse_insert(stream: _TokenStream) -> Statement:
+    stream.expect_keyword(KEYWORD_INTO)
+    table = stream.name()
+    stream.expect_keyword(KEYWORD_VALUES)
+
+    # Значения insert приводятся к типам столбцов в core, поэтому
+    # слова true/false здесь не преобразуются
+    values = stream.literal_list(convert_bool=False)
+
+    return stream.finish(Statement("insert", table, values))
+
+
+def _parse_select(stream: _TokenStream) -> Statement:
+    stream.expect_keyword(KEYWORD_FROM)
+    table = stream.name()
+
+    where = None
+    if stream.is_keyword(KEYWORD_WHERE):
+        stream.position += 1
+        where = stream.condition()
+
+    order_by, descending = None, False
+    if stream.is_keyword(KEYWORD_ORDER):
+        stream.position += 1
+        stream.expect_keyword(KEYWORD_BY)
+        order_by = stream.name()
+        if stream.is_keyword(KEYWORD_ASC) or stream.is_keyword(KEYWORD_DESC):
+            descending = stream.next().value.lower() == KEYWORD_DESC
+
+    limit = None
+    if stream.is_keyword(KEYWORD_LIMIT):
+        stream.position += 1
+        limit = stream.count()
+
+    return stream.finish(Statement("select", table, where=where, order_by=order_by,
+                                   descending=descending, limit=limit))
+
+
+def _parse_update(stream: _TokenStream) -> Statement:
+    table = stream.name()
+    stream.expect_keyword(KEYWORD_SET)
+    set_clause = stream.assignments()
+    stream.expect_keyword(KEYWORD_WHERE)
+    where = stream.condition()
+
+    return stream.finish(
+        Statement("update", table, set_clause=set_clause, where=where)
+    )
+
+
+def _parse_delete(stream: _TokenStream) -> Statement:
+    stream.expect_keyword(KEYWORD_FROM)
+    table = stream.name()
+    stream.expect_keyword(KEYWORD_WHERE)
+    where = stream.condition()
+
+    return stream.finish(Statement("delete", table, where=where))
+
+
+def _parse_table_only(stream: _TokenStream) -> Statement:
+    return stream.finish(Statement(stream.command, stream.name()))
+
+
+def _parse_no_args(stream: _TokenStream) -> Statement:
+    return stream.finish(Statement(stream.command))
+
+
+def _parse_set_storage(stream: _TokenStream) -> Statement:
+    table = stream.name()
+    return stream.finish(
+        Statement("set_storage", table, argument=stream.name().lower())
+    )
+
+
+def _parse_set_ttl(stream: _TokenStream) -> Statement:
+    table = stream.name()
+    return stream.finish(Statement("set_ttl", table, argument=stream.name()))
+
+
+def _parse_output(stream: _TokenStream) -> Statement:
+    argument = None if stream.at_end() else stream.name().lower()
+    return stream.finish(Statement("output", argument=argument))
+
+
+def _parse_backup(stream: _TokenStream) -> Statement:
+    return stream.finish(Statement("backup", argument=stream.name()))
+
+
+def _parse_restore(stream: _TokenStream) -> Statement:
+    directory = stream.name()
+
+    values = ()
+    if stream.is_keyword(KEYWORD_AT):
+        stream.position += 1
+        values = (stream.name(),)
+
+    return stream.finish(Statement("restore", values=values, argument=directory))
+
+
+def _parse_prepare(stream: _TokenStream) -> Statement:
+    name = stream.name()
+    stream.expect_keyword(KEYWORD_AS)
+
+    tokens = stream.tokens[stream.position:]
+    if not tokens or tokens[0].kind != TOKEN_WORD \
+            or tokens[0].value.lower() not in PREPARABLE_COMMANDS:
+        raise stream.error()
+
+    statement = _parse_tokens(tokens, allow_params=True)
+    return Statement("prepare", argument=name, statement=statement)
+
+
+def _parse_create(stream: _TokenStream) -> Statement:
+    stream.expect_keyword(KEYWORD_MATERIALIZED)
+    stream.expect_keyword(KEYWORD_VIEW)
+    name = stream.name()
+    stream.expect_keyword(KEYWORD_AS)
+
+    if not stream.is_keyword(KEYWORD_SELECT):
+        raise stream.error()
+    statement = _parse_tokens(stream.tokens[stream.position:])
+
+    # Сортировку и limit нельзя поддерживать инкрементально
+    if statement.order_by is not None or statement.limit is not None:
+        raise stream.error()
+    return Statement("create_view", statement.table, argument=name,
+                     statement=statement)
+
+
+def _parse_execute(stream: _TokenStream) -> Statement:
+    name = stream.name()
+    values = () if stream.at_end() else stream.literal_list()
+    return stream.finish(Statement("execute", argument=name, values=values))
+
+
+_STATEMENT_PARSERS = {
+    "create_table": _parse_create_table,
+    "drop_table": _parse_table_only,
+    "create": _parse_create,
+    "list_tables": _parse_no_args,
+    "insert": _parse_insert,
+    "select": _parse_select,
+    "update": _parse_update,
+    "delete": _parse_delete,
+    "info": _parse_table_only,
+    "check": _parse_table_only,
+    "vacuum": _parse_table_only,
+    "set_storage": _parse_set_storage,
+    "set_ttl": _parse_set_ttl,
+    "output": _parse_output,
+    "prepare": _parse_prepare,
+    "execute": _parse_execute,
+    "backup": _parse_backup,
+    "restore": _parse_restore,
+    "help": _parse_no_args,
+    "exit": _parse_no_args,
+}
+
+
+def _parse_tokens(tokens: list, allow_params: bool = False) -> Statement:
+    """Строит Statement из токенов команды."""
+
+    first = tokens[0]
+    command = str(first.value).lower() if first.kind == TOKEN_WORD else ""
+
+    if command not in _STATEMENT_PARSERS:
+        raise ValueError(f"Неизвестная команда: {first.value}")
+
+    stream = _TokenStream(tokens[1:], command)
+    statement = _STATEMENT_PARSERS[command](stream)
+
+    if stream.param_count and not allow_params:
+        raise ValueError("Параметры ? допустимы только в prepare.")
+    return statement
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def parse_statement(text: str):
+    """
+    Разбирает команду в Statement (None для пустой строки).
+
+    Результат кэшируется по тексту команды, поэтому повторяющиеся
+    команды не разбираются заново. Statement и вложенные в него словари
+    нельзя изменять.
+    """
+
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    return _parse_tokens(tokens)
+
+
+def count_parameters(statement: Statement) -> int:
+    """Возвращает число параметров ? в подготовленной команде."""
+
+    values = list(statement.values)
+    values += list((statement.set_clause or {}).values())
+    values += [condition.value for condition in (statement.where or {}).values()]
+    return sum(1 for value in values if isinstance(value, Param))
+
+
+def bind_parameters(statement: Statement, params: tuple) -> Statement:
+    """Подставляет значения параметров ? в подготовленную команду."""
+
+    expected = count_parameters(statement)
+    if len(params) != expected:
+        raise ValueError(f"Ожидается параметров: {expected}, "
+                         f"получено: {len(params)}.")
+
+    def bind(value):
+        return params[value.index] if isinstance(value, Param) else value
+
+    where = statement.where
+    if where is not None:
+        where = {column: Condition(condition.operator, bind(condition.value))
+                 for column, condition in where.items()}
+
+    set_clause = statement.set_clause
+    if set_clause is not None:
+        set_clause = {column: bind(value) for column, value in set_clause.items()}
+
+    return statement._replace(
+        values=tuple(bind(value) for value in statement.values),
+        set_clause=set_clause,
+        where=where,
+    )
@@ -0,0 +1,131 @@
+from .constants import RECORD_SLOT_PREFIX
+
+_record_classes = {}
+
+
+class Record:
+    """
+    Базовый класс компактной записи таблицы.
+
+    Значения хранятся в __slots__ в порядке столбцов схемы, поэтому у записи
+    нет собственного словаря. Для совместимости с остальным кодом запись
+    поддерживает интерфейс словаря: record["name"], get, keys, items, copy.
+    """
+
+    __slots__ = ()
+    _columns = ()
+    _slot_by_column = {}
+
+    def __init__(self, *values):
+        if len(values) != len(self.__slots__):
+            raise ValueError(f"Запись должна содержать {len(self.__slots__)} "
+                             f"значений ({', '.join(self._columns)}), "
+                             f"получено {len(values)}")
+
+        for slot, value in zip(self.__slots__, values):
+            setattr(self, slot, value)
+
+    def __getitem__(self, column):
+        try:
+            return getattr(self, self._slot_by_column[column])
+        except KeyError:
+            raise KeyError(column) from None
+
+    def __setitem__(self, column, value):
+        setattr(self, self._slot_by_column[column], value)
+
+    def __contains__(self, column) -> bool:
+        return column in self._slot_by_column
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Record):
+            return (self._columns == other._columns
+                    and self.values() == other.values())
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def get(self, column, default=None):
+        """Возвращает значение столбца или default, если столбца нет."""
+
+        slot = self._slot_by_column.get(column)
+        if slot is None:
+            return default
+        return getattr(self, slot)
+
+    def keys(self) -> tuple:
+        """Возвращает имена столбцов в порядке схемы."""
+
+        return self._columns
+
+    def values(self) -> tuple:
+        """Возвращает значения записи в порядке схемы."""
+
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def items(self):
+        """Возвращает пары (столбец, значение)."""
+
+        return zip(self._columns, self.values())
+
+    def copy(self) -> "Record":
+        """Возвращает копию записи."""
+
+        return type(self)(*self.values())
+
+    def to_dict(self) -> dict:
+        """Преобразует запись в словарь (для вывода и сохранения)."""
+
+        return dict(zip(self._columns, self.values()))
+
+
+def get_record_class(columns) -> type:
+    """Возвращает (и кэширует) класс записи для набора столбцов."""
+
+    columns = tuple(columns)
+    record_class = _record_classes.get(columns)
+
+    if record_class is None:
+        slots = tuple(f"{RECORD_SLOT_PREFIX}{i}" for i in range(len(columns)))
+        record_class = type("Record", (Record,), {
+            "__slots__": slots,
+            "_columns": columns,
+            "_slot_by_column": dict(zip(columns, slots)),
+        })
+        _record_classes[columns] = record_class
+
+    return record_class
+
+
+def make_record(columns, values) -> Record:
+    """Создает запись из списка столбцов и значений в том же порядке."""
+
+    return get_record_class(columns)(*values)
+
+
+def record_from_pairs(pairs: list):
+    """
+    Хук для json.load: строит запись сразу из пар ключ-значение,
+    не создавая промежуточный словарь.
+    """
+
+    return make_record([key for key, _ in pairs], [value for _, value in pairs])
+
+
+def record_to_json(obj):
+    """Хук для json.dump: преобразует запись в словарь при сохранении."""
+
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Объект типа {type(obj).__name__} не сериализуется в JSON")
@@ -0,0 +1,143 @@
+import json
+import sys
+from itertools import chain, islice
+
+from .constants import (
+    JSON_ENSURE_ASCII,
+    OUTPUT_CSV,
+    OUTPUT_JSONL,
+    OUTPUT_NONE,
+    OUTPUT_SAMPLE_SIZE,
+    OUTPUT_TABLE,
+    OUTPUT_TSV,
+    TRUNCATION_MARK,
+)
+
+
+def _render_pretty_table(records: list, headers: list, out) -> None:
+    """Выводит небольшой результат через PrettyTable (точная ширина)."""
+
+    # prettytable импортируется только при первом выводе таблицы
+    from prettytable import PrettyTable
+
+    table = PrettyTable(headers)
+    for record in records:
+        table.add_row([record[header] for header in headers])
+
+    out.write(f"{table}\n")
+
+
+def _fit(text: str, width: int) -> str:
+    """Выравнивает значение по центру столбца, обрезая слишком длинное."""
+
+    if len(text) > width:
+        return text[:width - len(TRUNCATION_MARK)] + TRUNCATION_MARK
+    return text.center(width)
+
+
+def _render_streaming_table(sample: list, records, headers: list, out) -> None:
+    """
+    Выводит большой результат в виде таблицы без предварительного прохода
+    по всем записям: ширина столбцов оценивается по первым
+    OUTPUT_SAMPLE_SIZE записям (sample), более длинные значения обрезаются.
+    """
+
+    widths = [len(header) for header in headers]
+    for record in sample:
+        for i, header in enumerate(headers):
+            widths[i] = max(widths[i], len(str(record[header])))
+
+    border = "+" + "+".join("-" * (width + 2) for width in widths) + "+\n"
+
+    def format_row(cells) -> str:
+        return "| " + " | ".join(_fit(cell, width)
+                                 for cell, width in zip(cells, widths)) + " |\n"
+
+    out.write(border)
+    out.write(format_row(headers))
+    out.write(border)
+    for record in records:
+        out.write(format_row(str(record[header]) for header in headers))
+    out.write(border)
+
+
+def render_table(records, headers: list, out) -> None:
+    """Выводит записи таблицей (режим table)."""
+
+    records = iter(records)
+    sample = list(islice(records, OUTPUT_SAMPLE_SIZE + 1))
+
+    if len(sample) <= OUTPUT_SAMPLE_SIZE:
+        _render_pretty_table(sample, headers, out)
+    else:
+        _render_streaming_table(sample, chain(sample, records), headers, out)
+
+
+def _tsv_cell(value) -> str:
+    """Экранирует значение для TSV (табуляции и переводы строк)."""
+
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n"))
+
+
+def render_tsv(records, headers: list, out) -> None:
+    """Выводит записи в формате TSV с заголовком."""
+
+    out.write("\t".join(headers) + "\n")
+    for record in records:
+        out.write("\t".join(_tsv_cell(record[header]) for header in headers)
+                  + "\n")
+
+
+def render_csv(records, headers: list, out) -> None:
+    """Выводит записи в формате CSV с заголовком."""
+
+    import csv
+
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(headers)
+    for record in records:
+        writer.writerow([record[header] for header in headers])
+
+
+def render_jsonl(records, headers: list, out) -> None:
+    """Выводит записи в формате JSON Lines (один объект на строку)."""
+
+    for record in records:
+        row = {header: record[header] for header in headers}
+        out.write(json.dumps(row, ensure_ascii=JSON_ENSURE_ASCII) + "\n")
+
+
+def render_none(records, headers: list, out) -> None:
+    """Ничего не выводит (для замеров и скриптов)."""
+
+
+_RENDERERS = {
+    OUTPUT_TABLE: render_table,
+    OUTPUT_TSV: render_tsv,
+    OUTPUT_CSV: render_csv,
+    OUTPUT_JSONL: render_jsonl,
+    OUTPUT_NONE: render_none,
+}
+
+
+def render(records, output_format: str, out=None) -> bool:
+    """
+    Выводит записи в выбранном формате, построчно, в out (по умолчанию stdout).
+
+    records может быть списком или итератором: записи выводятся по мере
+    получения, без загрузки всего результата в память.
+
+    Returns:
+        True, если была выведена хотя бы одна запись
+    """
+
+    out = out or sys.stdout
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        return False
+
+    headers = list(first.keys())
+    _RENDERERS[output_format](chain([first], records), headers, out)
+    return True
@@ -0,0 +1,203 @@
+import operator
+import os
+
+from .constants import (
+    BOOL_FALSE_VALUES,
+    BOOL_TRUE_VALUES,
+    OP_EQ,
+    OP_GE,
+    OP_GT,
+    OP_LE,
+    OP_LT,
+    OP_NE,
+    PARALLEL_SCAN_WORKERS,
+)
+from .parser import Condition
+
+_RANGE_OPERATORS = {
+    OP_GT: operator.gt,
+    OP_GE: operator.ge,
+    OP_LT: operator.lt,
+    OP_LE: operator.le,
+}
+
+_executor = None
+
+
+def _split_condition(value) -> tuple:
+    """Возвращает (оператор, значение); простое значение означает равенство."""
+
+    if isinstance(value, Condition):
+        return value.operator, value.value
+    return OP_EQ, value
+
+
+def _literal_variants(value) -> dict:
+    """
+    Приводит значение из условия ко всем типам, с которыми его можно сравнить.
+
+    Returns:
+        Словарь {тип: значение этого типа}
+    """
+
+    text = str(value)
+    variants = {str: text}
+
+    try:
+        variants[int] = int(text)
+    except ValueError:
+        pass
+
+    if text.lower() in BOOL_TRUE_VALUES:
+        variants[bool] = True
+    elif text.lower() in BOOL_FALSE_VALUES:
+        variants[bool] = False
+
+    return variants
+
+
+def compile_condition(columns, condition: dict) -> tuple:
+    """
+    Компилирует условие {столбец: Condition} в сериализуемую форму.
+
+    Returns:
+        Кортеж троек (позиция столбца или None, оператор, варианты значения);
+        для литерала null варианты равны None
+    """
+
+    positions = {column: i for i, column in enumerate(columns)}
+    compiled = []
+
+    for column, value in condition.items():
+        op, literal = _split_condition(value)
+        variants = None if literal is None else _literal_variants(literal)
+        compiled.append((positions.get(column), op, variants))
+
+    return tuple(compiled)
+
+
+def row_matches(row: tuple, compiled: tuple) -> bool:
+    """Проверяет кортеж значений на соответствие скомпилированному условию."""
+
+    for position, op, variants in compiled:
+        actual = "" if position is None else row[position]
+
+        if variants is None:
+            # null сравнивается только на (не)равенство и только с None,
+            # а не со строкой "None"
+            if op == OP_EQ and actual is not None:
+                return False
+            if op == OP_NE and actual is None:
+                return False
+            if op not in (OP_EQ, OP_NE):
+                return False
+        elif op == OP_EQ:
+            if str(actual) != variants[str]:
+                return False
+        elif op == OP_NE:
+            if str(actual) == variants[str]:
+                return False
+        else:
+            expected = variants.get(type(actual))
+            if expected is None or not _RANGE_OPERATORS[op](actual, expected):
+                return False
+
+    return True
+
+
+def zone_may_match(zone: dict, condition: dict) -> bool:
+    """
+    Проверяет по зональной карте сегмента (min/max/nulls столбцов),
+    могут ли в нем быть записи, удовлетворяющие условию.
+    """
+
+    for column, value in condition.items():
+        stats = zone.get(column)
+        if not stats:
+            continue
+
+        op, literal = _split_condition(value)
+        if literal is None:
+            if op == OP_EQ and not stats.get("nulls", 1):
+                return False
+            if op == OP_NE and stats["min"] is None and not stats.get("mixed"):
+                return False
+            if op not in (OP_EQ, OP_NE):
+                return False
+            continue
+
+        if stats["min"] is None or op == OP_NE:
+            continue
+
+        low, high = stats["min"], stats["max"]
+        expected = _literal_variants(literal).get(type(low))
+        if expected is None:
+            return False
+
+        if op == OP_EQ and not low <= expected <= high:
+            return False
+        if op == OP_GT and high <= expected:
+            return False
+        if op == OP_GE and high < expected:
+            return False
+        if op == OP_LT and low >= expected:
+            return False
+        if op == OP_LE and low > expected:
+            return False
+
+    return True
+
+
+def filter_records(records, condition: dict):
+    """Потоково отбирает записи, удовлетворяющие условию."""
+
+    compiled = None
+    for record in records:
+        if compiled is None:
+            compiled = compile_condition(record.keys(), condition)
+        if row_matches(record.values(), compiled):
+            yield record
+
+
+def record_matcher(columns, condition: dict):
+    """Возвращает функцию проверки одной записи по условию (пустое - любая)."""
+
+    compiled = compile_condition(columns, condition or {})
+    return lambda record: row_matches(record.values(), compiled)
+
+
+def scan_workers() -> int:
+    """Возвращает число процессов для параллельного сканирования."""
+
+    return PARALLEL_SCAN_WORKERS or os.cpu_count() or 1
+
+
+def scan_executor():
+    """
+    Лениво создает общий пул процессов (concurrent.futures импортируется
+    только при первом параллельном сканировании).
+    """
+
+    global _executor
+    if _executor is None:
+        from concurrent.futures import ProcessPoolExecutor
+
+        _executor = ProcessPoolExecutor(max_workers=scan_workers())
+    return _executor
+
+
+def find_matches(table_data: list, condition: dict) -> list:
+    """
+    Возвращает индексы записей, удовлетворяющих условию, в порядке таблицы.
+
+    Загруженные в память данные сканируются в текущем процессе; большие
+    сегментированные таблицы сканируются по сегментам в пуле процессов
+    (см. storage.scan_table).
+    """
+
+    if not table_data:
+        return []
+
+    compiled = compile_condition(table_data[0].keys(), condition)
+    return [i for i, record in enumerate(table_data)
+            if row_matches(record.values(), compiled)]
@@ -0,0 +1,88 @@
+import heapq
+import json
+from itertools import islice
+
+from .constants import ENCODING, SORT_RUN_SIZE
+from .records import get_record_class
+
+
+def sort_key(column: str, descending: bool = False):
+    """
+    Возвращает ключ сортировки записей по столбцу.
+
+    Пустые значения (None) идут последними в обоих направлениях (при
+    сортировке по убыванию их признак инвертируется), значения разных
+    типов группируются по типу, поэтому сравнение никогда не падает.
+    """
+
+    def key(record):
+        value = record[column]
+        return (value is None) != descending, type(value).__name__, value
+
+    return key
+
+
+def top_k(records, column: str, limit: int, descending: bool = False) -> list:
+    """
+    Возвращает limit первых записей в порядке сортировки.
+
+    Используется куча размера limit, поэтому память не зависит от размера
+    таблицы. Записи с равными значениями сохраняют исходный порядок.
+    """
+
+    select_top = heapq.nlargest if descending else heapq.nsmallest
+    return select_top(limit, records, key=sort_key(column, descending))
+
+
+def _spill_run(run: list):
+    """Сбрасывает отсортированную серию во временный файл (JSON Lines)."""
+
+    import tempfile
+
+    f = tempfile.TemporaryFile('w+', encoding=ENCODING)
+    for record in run:
+        f.write(json.dumps(record.values()) + "\n")
+    f.seek(0)
+    return f
+
+
+def _read_run(f, columns):
+    """Потоково читает серию из временного файла и закрывает его."""
+
+    record_class = get_record_class(columns)
+    with f:
+        for line in f:
+            yield record_class(*json.loads(line))
+
+
+def external_sort(records, column: str, descending: bool = False):
+    """
+    Потоково сортирует записи по столбцу.
+
+    Если записей не больше SORT_RUN_SIZE, они сортируются в памяти.
+    Иначе записи разбиваются на отсортированные серии по SORT_RUN_SIZE,
+    серии сбрасываются во временные файлы и сливаются (heapq.merge),
+    так что в памяти находится не больше одной серии.
+    """
+
+    records = iter(records)
+    key = sort_key(column, descending)
+
+    run = sorted(islice(records, SORT_RUN_SIZE), key=key, reverse=descending)
+    if len(run) < SORT_RUN_SIZE:
+        yield from run
+        return
+
+    columns = run[0].keys()
+    runs = []
+    try:
+        while run:
+            runs.append(_spill_run(run))
+            run = sorted(islice(records, SORT_RUN_SIZE), key=key,
+                         reverse=descending)
+
+        yield from heapq.merge(*(_read_run(f, columns) for f in runs),
+                               key=key, reverse=descending)
+    finally:
+        for f in runs:
+            f.close()
@@ -0,0 +1,1767 @@
+import json
+import os
+import sys
+import time
+import zlib
+from bisect import bisect_left, bisect_right
+from collections import deque
+from contextlib import contextmanager
+from heapq import merge
+from itertools import count, islice
+from pathlib import Path
+
+from .constants import (
+    COMPACT_HEADER_COLUMNS,
+    DATA_DIRECTORY,
+    DEFAULT_STORAGE_FORMAT,
+    ENCODING,
+    ID_COLUMN,
+    INDEX_COMPLETE_KEY,
+    INDEX_FILE_INFIX,
+    JSON_COMPACT_SEPARATORS,
+    JSON_ENSURE_ASCII,
+    JSON_INDENT,
+    JSON_MEMORY_RATIO,
+    MANIFEST_FILE,
+    PARALLEL_SCAN_THRESHOLD,
+    PIN_FILE_SUFFIX,
+    PINS_DIRECTORY,
+    SEGMENT_FILE_PREFIX,
+    SEGMENT_SIZE,
+    STORAGE_COMPACT,
+    STORAGE_FILE_EXTENSIONS,
+    STORAGE_FORMATS,
+    STORAGE_GZIP,
+    STORAGE_JSON,
+    STORAGE_LZMA,
+    STORAGE_ZSTD,
+    TABLE_LOCK_SUFFIX,
+    TEMP_FILE_SUFFIX,
+    TTL_SWEEP_BATCH_SEGMENTS,
+    VACUUM_IO_LIMIT,
+)
+from .records import get_record_class, record_from_pairs, record_to_json
+from .scan import (
+    compile_condition,
+    filter_records,
+    row_matches,
+    scan_executor,
+    scan_workers,
+    zone_may_match,
+)
+
+_pin_numbers = count()
+
+# Открытые хэш-индексы: (таблица, столбец) -> объект dbm
+_open_indexes = {}
+
+
+def _open_zstd(filepath: Path, mode: str):
+    """Открывает файл, сжатый zstd (нужен пакет zstandard)."""
+
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError(
+            "Сжатие zstd недоступно: установите пакет zstandard"
+        ) from None
+    return zstandard.open(filepath, mode, encoding=ENCODING)
+
+
+def _open_table_file(filepath: Path, storage_format: str, mode: str):
+    """
+    Открывает файл таблицы в текстовом режиме с учетом сжатия.
+
+    Модули сжатия импортируются при первом обращении, чтобы не замедлять
+    запуск программы.
+    """
+
+    if storage_format == STORAGE_GZIP:
+        import gzip
+        return gzip.open(filepath, f"{mode}t", encoding=ENCODING)
+    if storage_format == STORAGE_LZMA:
+        import lzma
+        return lzma.open(filepath, f"{mode}t", encoding=ENCODING)
+    if storage_format == STORAGE_ZSTD:
+        return _open_zstd(filepath, f"{mode}t")
+    return open(filepath, mode, encoding=ENCODING)
+
+
+def _dump_row(values) -> str:
+    """Сериализует значения записи в строку компактного формата."""
+
+    return json.dumps(list(values), ensure_ascii=JSON_ENSURE_ASCII,
+                      separators=JSON_COMPACT_SEPARATORS) + "\n"
+
+
+def _dump_header(columns) -> str:
+    """Сериализует заголовок файла компактного формата."""
+
+    header = {COMPACT_HEADER_COLUMNS: list(columns)}
+    return json.dumps(header, ensure_ascii=JSON_ENSURE_ASCII) + "\n"
+
+
+def _replace_file(filepath: Path, write_func) -> None:
+    """Записывает файл через временный файл и атомарно подменяет его."""
+
+    tmp_path = filepath.with_name(filepath.name + TEMP_FILE_SUFFIX)
+    write_func(tmp_path)
+    os.replace(tmp_path, filepath)
+
+
+# === ОДНОФАЙЛОВЫЕ ТАБЛИЦЫ ===
+
+def table_file_path(table_name: str, storage_format: str) -> Path:
+    """Возвращает путь к однофайловой таблице в заданном формате."""
+
+    extension = STORAGE_FILE_EXTENSIONS[storage_format]
+    return Path(DATA_DIRECTORY) / f"{table_name}{extension}"
+
+
+def find_table_file(table_name: str) -> tuple:
+    """
+    Ищет однофайловую таблицу на диске (формат json или файлы,
+    записанные до появления сегментов).
+
+    Returns:
+        (путь, формат хранения) или (None, None), если файла нет
+    """
+
+    for storage_format in STORAGE_FORMATS:
+        filepath = table_file_path(table_name, storage_format)
+        if filepath.exists():
+            return filepath, storage_format
+    return None, None
+
+
+def _iter_compact_records(f, limit: int = None):
+    """Потоково читает записи из файла в компактном формате."""
+
+    header = f.readline()
+    if not header:
+        return
+
+    columns = json.loads(header)[COMPACT_HEADER_COLUMNS]
+    record_class = get_record_class(columns)
+
+    for line in islice(f, limit):
+        if line.strip():
+            yield record_class(*json.loads(line))
+
+
+def _read_table_file(filepath: Path, storage_format: str) -> list:
+    """Читает все записи однофайловой таблицы."""
+
+    with _open_table_file(filepath, storage_format, 'r') as f:
+        if storage_format == STORAGE_JSON:
+            return json.load(f, object_pairs_hook=record_from_pairs)
+        return list(_iter_compact_records(f))
+
+
+def _write_json_file(table_name: str, data: list) -> None:
+    """Записывает таблицу одним JSON-файлом с отступами."""
+
+    def write(path):
+        with open(path, 'w', encoding=ENCODING) as f:
+            json.dump(data, f, ensure_ascii=JSON_ENSURE_ASCII,
+                      indent=JSON_INDENT, default=record_to_json)
+
+    _replace_file(table_file_path(table_name, STORAGE_JSON), write)
+
+
+# === СЕГМЕНТИРОВАННЫЕ ТАБЛИЦЫ ===
+#
+# Сегменты не изменяются после записи (кроме дописывания строк в хвост
+# несжатого сегмента, которое не затрагивает уже учтенные строки). Каждая
+# запись сохраняет новую версию манифеста; сегменты, вышедшие из таблицы,
+# попадают в список garbage с номером версии, начиная с которой они
+# не нужны, и удаляются, только когда их не читает ни один снимок.
+
+def _table_dir(table_name: str) -> Path:
+    """Возвращает каталог сегментированной таблицы."""
+
+    return Path(DATA_DIRECTORY) / table_name
+
+
+def _load_manifest(table_name: str):
+    """Загружает манифест таблицы или возвращает None, если его нет."""
+
+    try:
+        with open(_table_dir(table_name) / MANIFEST_FILE, 'r',
+                  encoding=ENCODING) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_manifest(table_name: str, manifest: dict) -> None:
+    """Атомарно сохраняет манифест таблицы."""
+
+    def write(path):
+        with open(path, 'w', encoding=ENCODING) as f:
+            json.dump(manifest, f, ensure_ascii=JSON_ENSURE_ASCII)
+
+    _replace_file(_table_dir(table_name) / MANIFEST_FILE, write)
+
+
+def _new_manifest(storage_format: str, columns) -> dict:
+    """Создает пустой манифест."""
+
+    return {
+        "format": storage_format,
+        "columns": list(columns),
+        "version": 0,
+        "next_segment": 1,
+        "sorted_by": None,
+        "segments": [],
+        "garbage": [],
+    }
+
+
+def _pins_dir(table_name: str) -> Path:
+    """Возвращает каталог закреплений версий таблицы."""
+
+    return _table_dir(table_name) / PINS_DIRECTORY
+
+
+def _process_alive(pid: int) -> bool:
+    """Проверяет, что процесс читателя еще работает."""
+
+    if pid == os.getpid() or os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _pin_snapshot(table_name: str) -> tuple:
+    """
+    Закрепляет текущую версию таблицы за читателем.
+
+    Пока закрепление существует, сегменты этой версии не удаляются, даже
+    если таблицу перезаписывают. Версия перечитывается после создания
+    файла закрепления, чтобы не закрепить уже удаленную версию.
+
+    Returns:
+        (манифест, путь закрепления) или (None, None) для несегментированной
+        таблицы
+    """
+
+    while True:
+        manifest = _load_manifest(table_name)
+        if manifest is None:
+            return None, None
+
+        version = manifest.get("version", 0)
+        pin = _pins_dir(table_name) / (f"{version}-{os.getpid()}-"
+                                       f"{next(_pin_numbers)}{PIN_FILE_SUFFIX}")
+        try:
+            pin.parent.mkdir(exist_ok=True)
+            pin.touch()
+        except FileNotFoundError:
+            # Каталог таблицы удален (перевод в json) - читаем заново
+            continue
+
+        current = _load_manifest(table_name)
+        if current is not None and current.get("version", 0) == version:
+            return current, pin
+        pin.unlink(missing_ok=True)
+
+
+def _oldest_pinned_version(table_name: str):
+    """
+    Возвращает самую старую закрепленную версию таблицы или None.
+
+    Закрепления завершившихся процессов удаляются.
+    """
+
+    try:
+        pins = list(_pins_dir(table_name).iterdir())
+    except FileNotFoundError:
+        return None
+
+    versions = []
+    for pin in pins:
+        version, pid, _ = pin.stem.split("-")
+        if not _process_alive(int(pid)):
+            pin.unlink(missing_ok=True)
+            continue
+        versions.append(int(version))
+
+    return min(versions, default=None)
+
+
+def _commit_manifest(table_name: str, manifest: dict, retired=()) -> None:
+    """
+    Сохраняет новую версию манифеста.
+
+    Сегменты retired переносятся в garbage. Закрепления просматриваются
+    только после сохранения: читатель, закрепивший старую версию позже,
+    при перепроверке увидит новую и закрепит ее. Сегменты из garbage,
+    которые не нужны ни одному закрепленному снимку, удаляются; остальные
+    остаются в списке до следующей версии, а уже удаленные из него
+    убираются.
+    """
+
+    table_dir = _table_dir(table_name)
+    manifest["version"] = manifest.get("version", 0) + 1
+    garbage = [entry for entry in manifest.get("garbage", [])
+               if (table_dir / entry["file"]).exists()]
+    garbage += [{"file": segment["file"], "retired": manifest["version"]}
+                for segment in retired]
+    manifest["garbage"] = garbage
+
+    _save_manifest(table_name, manifest)
+
+    oldest = _oldest_pinned_version(table_name)
+    _remove_segment_files(table_name, [entry for entry in garbage
+                                       if oldest is None
+                                       or entry["retired"] <= oldest])
+
+
+def _is_sorted_by_id(columns, rows) -> bool:
+    """Проверяет, что строки идут по строго возрастающему ID."""
+
+    if ID_COLUMN not in columns:
+        return False
+
+    position = list(columns).index(ID_COLUMN)
+    ids = [values[position] for values in rows]
+    return all(type(value) is int for value in ids) and \
+        all(prev < value for prev, value in zip(ids, ids[1:]))
+
+
+def _update_zone(zone: dict, columns, values) -> None:
+    """Учитывает значения записи в зональной карте (min/max/nulls)."""
+
+    for column, value in zip(columns, values):
+        stats = zone.setdefault(column, {"min": None, "max": None, "nulls": 0})
+
+        if value is None:
+            stats["nulls"] += 1
+            continue
+        if stats.get("mixed"):
+            continue
+
+        low = stats["min"]
+        if low is None:
+            stats["min"] = stats["max"] = value
+        elif type(low) is not type(value):
+            # Значения разных типов несравнимы - отключаем пропуск сегмента
+            stats.update(min=None, max=None, mixed=True)
+        else:
+            stats["min"] = min(low, value)
+            stats["max"] = max(stats["max"], value)
+
+
+def _segment_path(table_name: str, segment: dict) -> Path:
+    """Возвращает путь к файлу сегмента."""
+
+    return _table_dir(table_name) / segment["file"]
+
+
+def _write_segment(table_name: str, manifest: dict, rows: list) -> dict:
+    """
+    Записывает новый файл сегмента и возвращает его описание для манифеста.
+
+    Args:
+        rows: Список кортежей значений в порядке столбцов манифеста
+    """
+
+    storage_format = manifest["format"]
+    number = manifest["next_segment"]
+    manifest["next_segment"] = number + 1
+
+    segment = {
+        "file": f"{SEGMENT_FILE_PREFIX}{number:06d}"
+                f"{STORAGE_FILE_EXTENSIONS[storage_format]}",
+        "rows": len(rows),
+        "zone": {},
+    }
+
+    filepath = _segment_path(table_name, segment)
+    with _open_table_file(filepath, storage_format, 'w') as f:
+        header = _dump_header(manifest["columns"]).encode(ENCODING)
+        f.write(header.decode(ENCODING))
+        checksum = zlib.crc32(header)
+        raw_bytes = len(header)
+
+        for values in rows:
+            line = _dump_row(values)
+            f.write(line)
+            encoded = line.encode(ENCODING)
+            checksum = zlib.crc32(encoded, checksum)
+            raw_bytes += len(encoded)
+            _update_zone(segment["zone"], manifest["columns"], values)
+
+    # CRC32 и размер несжатого содержимого сегмента (заголовок и строки)
+    segment["checksum"] = checksum
+    segment["raw_bytes"] = raw_bytes
+    segment["bytes"] = filepath.stat().st_size
+    return segment
+
+
+def _read_segment(table_name: str, manifest: dict, segment: dict):
+    """Потоково читает записи сегмента (не больше числа строк из манифеста)."""
+
+    with _open_table_file(_segment_path(table_name, segment),
+                          manifest["format"], 'r') as f:
+        yield from _iter_compact_records(f, segment["rows"])
+
+
+def _remove_segment_files(table_name: str, segments: list) -> None:
+    """Удаляет файлы сегментов, которые больше не читает ни один снимок."""
+
+    for segment in segments:
+        _segment_path(table_name, segment).unlink(missing_ok=True)
+
+
+def _write_rows(table_name: str, manifest: dict, rows) -> None:
+    """
+    Потоково записывает строки (кортежи значений) в новые сегменты
+    по SEGMENT_SIZE и отмечает в манифесте, упорядочены ли они по ID.
+    """
+
+    columns = manifest["columns"]
+    id_position = columns.index(ID_COLUMN) if ID_COLUMN in columns else None
+    sorted_by_id = id_position is not None
+    last_id = None
+
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, SEGMENT_SIZE))
+        if not chunk:
+            break
+
+        if sorted_by_id:
+            sorted_by_id = _is_sorted_by_id(columns, chunk) and (
+                last_id is None or chunk[0][id_position] > last_id)
+            last_id = chunk[-1][id_position]
+        manifest["segments"].append(_write_segment(table_name, manifest, chunk))
+
+    manifest["sorted_by"] = ID_COLUMN if sorted_by_id else None
+
+
+def _write_segmented(table_name: str, data: list, storage_format: str) -> None:
+    """Перезаписывает таблицу сегментами по SEGMENT_SIZE записей."""
+
+    old_manifest = _load_manifest(table_name)
+    if data:
+        columns = data[0].keys()
+    elif old_manifest:
+        columns = old_manifest["columns"]
+    else:
+        columns = []
+
+    manifest = _new_manifest(storage_format, columns)
+    if old_manifest:
+        manifest["version"] = old_manifest.get("version", 0)
+        manifest["next_segment"] = old_manifest["next_segment"]
+        manifest["garbage"] = old_manifest.get("garbage", [])
+
+    _table_dir(table_name).mkdir(parents=True, exist_ok=True)
+    _write_rows(table_name, manifest, (record.values() for record in data))
+
+    _commit_manifest(table_name, manifest,
+                     old_manifest["segments"] if old_manifest else ())
+
+
+def _append_to_tail(table_name: str, manifest: dict, values: tuple) -> None:
+    """Дописывает запись в последний сегмент (или создает новый)."""
+
+    segments = manifest["segments"]
+    tail = segments[-1] if segments else None
+
+    if manifest.get("sorted_by") == ID_COLUMN and tail is not None:
+        # Таблица остается упорядоченной по ID, только если новый ID больше
+        # всех прежних
+        last_id = tail["zone"].get(ID_COLUMN, {}).get("max")
+        new_id = dict(zip(manifest["columns"], values)).get(ID_COLUMN)
+        if last_id is None or type(new_id) is not int or new_id <= last_id:
+            manifest["sorted_by"] = None
+
+    if tail is None or tail["rows"] >= SEGMENT_SIZE:
+        segments.append(_write_segment(table_name, manifest, [values]))
+    elif manifest["format"] == STORAGE_COMPACT:
+        # Несжатый сегмент дописывается на месте с известного по манифесту
+        # смещения: читатели все равно читают не больше строк, чем указано
+        # в манифесте, а хвост от прерванной записи затирается
+        line = _dump_row(values).encode(ENCODING)
+        with open(_segment_path(table_name, tail), 'r+b') as f:
+            f.seek(tail["bytes"])
+            f.write(line)
+            f.truncate()
+            tail["bytes"] = tail["raw_bytes"] = f.tell()
+        tail["rows"] += 1
+        if "checksum" in tail:
+            tail["checksum"] = zlib.crc32(line, tail["checksum"])
+        _update_zone(tail["zone"], manifest["columns"], values)
+    else:
+        # Сжатый сегмент переписывается целиком (не больше SEGMENT_SIZE строк)
+        rows = [record.values()
+                for record in _read_segment(table_name, manifest, tail)]
+        rows.append(values)
+        segments[-1] = _write_segment(table_name, manifest, rows)
+        _commit_manifest(table_name, manifest, [tail])
+        return
+
+    _commit_manifest(table_name, manifest)
+
+
+def _segment_number(filename: str):
+    """Возвращает номер сегмента по имени файла или None."""
+
+    if not filename.startswith(SEGMENT_FILE_PREFIX):
+        return None
+    number = filename[len(SEGMENT_FILE_PREFIX):].split(".")[0]
+    return int(number) if number.isdigit() else None
+
+
+def _orphan_files(table_name: str, manifest: dict, below: int = None) -> list:
+    """
+    Возвращает файлы сегментов, которых нет ни в манифесте, ни в garbage
+    (остатки прерванных записей). Если задано below, учитываются только
+    сегменты с номером меньше below.
+    """
+
+    referenced = {segment["file"] for segment in manifest["segments"]}
+    referenced |= {entry["file"] for entry in manifest.get("garbage", [])}
+
+    orphans = []
+    for filepath in _table_dir(table_name).iterdir():
+        number = _segment_number(filepath.name)
+        if number is None or filepath.name in referenced:
+            continue
+        if below is None or number < below:
+            orphans.append(filepath)
+    return orphans
+
+
+def _verify_segment(table_name: str, manifest: dict, segment: dict,
+                    check_record, state: dict) -> list:
+    """
+    Перечитывает сегмент и сверяет его с манифестом: число строк,
+    контрольную сумму, зональную карту и порядок ID.
+
+    Returns:
+        Список найденных проблем
+    """
+
+    name = segment["file"]
+    columns = manifest["columns"]
+    record_class = get_record_class(columns)
+    id_position = columns.index(ID_COLUMN) if ID_COLUMN in columns else None
+    problems = []
+    zone = {}
+    rows = 0
+
+    try:
+        with _open_table_file(_segment_path(table_name, segment),
+                              manifest["format"], 'r') as f:
+            header = f.readline()
+            checksum = zlib.crc32(header.encode(ENCODING))
+            if json.loads(header)[COMPACT_HEADER_COLUMNS] != columns:
+                problems.append(f"Сегмент {name}: заголовок не совпадает "
+                                f"со столбцами манифеста")
+
+            for line in islice(f, segment["rows"]):
+                checksum = zlib.crc32(line.encode(ENCODING), checksum)
+                values = json.loads(line)
+                rows += 1
+                _update_zone(zone, columns, values)
+
+                if id_position is not None:
+                    record_id = values[id_position]
+                    if state["last_id"] is not None and not (
+                            type(record_id) is int and record_id > state["last_id"]):
+                        state["sorted"] = False
+                    state["last_id"] = record_id
+
+                if len(values) != len(columns):
+                    problems.append(f"Сегмент {name}: строка {rows} содержит "
+                                    f"{len(values)} значений вместо "
+                                    f"{len(columns)}")
+                elif check_record:
+                    problem = check_record(record_class(*values))
+                    if problem:
+                        problems.append(problem)
+    except FileNotFoundError:
+        return [f"Сегмент {name}: файл не найден"]
+    except Exception as e:
+        # Поврежденный файл может дать ошибку любого модуля сжатия
+        return problems + [f"Сегмент {name}: файл не читается ({e})"]
+
+    if rows != segment["rows"]:
+        problems.append(f"Сегмент {name}: записей {rows}, "
+                        f"в манифесте {segment['rows']}")
+    if "checksum" not in segment:
+        problems.append(f"Сегмент {name}: нет контрольной суммы "
+                        f"(выполните vacuum)")
+    elif checksum != segment["checksum"]:
+        problems.append(f"Сегмент {name}: контрольная сумма не совпадает")
+    if zone != segment["zone"]:
+        problems.append(f"Сегмент {name}: зональная карта не соответствует данным")
+
+    state["rows"] += rows
+    return problems
+
+
+def _throttle(started: float, processed: int, io_limit) -> None:
+    """Приостанавливает работу, если скорость чтения превышает io_limit."""
+
+    if not io_limit:
+        return
+    delay = processed / io_limit - (time.monotonic() - started)
+    if delay > 0:
+        time.sleep(delay)
+
+
+# === ХЭШ-ИНДЕКСЫ ===
+#
+# Индекс уникального столбца хранит значение (в JSON) -> ID записи в dbm.
+# Индекс открывается на время команды под блокировкой таблицы (lock_table)
+# и закрывается до ее снятия, поэтому процессы не держат устаревших копий.
+# Отметка полного построения (INDEX_COMPLETE_KEY) записывается только при
+# закрытии: индекс, не закрытый после сбоя, при следующем открытии
+# строится заново.
+
+@contextmanager
+def lock_table(table_name: str):
+    """
+    Блокирует таблицу от изменения другими процессами (flock на файле
+    data/<таблица>.lock) на время команды, чтобы проверка уникальности
+    и запись выполнялись атомарно. Перед снятием блокировки индексы
+    таблицы закрываются: следующий владелец блокировки (в том числе этот
+    же процесс) читает их с диска со всеми чужими изменениями.
+    Блокировка не реентерабельна.
+    """
+
+    try:
+        import fcntl
+    except ImportError:
+        # Без flock (Windows) таблицу меняет только один процесс
+        fcntl = None
+
+    Path(DATA_DIRECTORY).mkdir(exist_ok=True)
+    lock_path = Path(DATA_DIRECTORY) / f"{table_name}{TABLE_LOCK_SUFFIX}"
+    with open(lock_path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            close_indexes(table_name)
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _index_path(table_name: str, column: str) -> Path:
+    """Возвращает путь к файлу индекса столбца (без расширений dbm)."""
+
+    return Path(DATA_DIRECTORY) / f"{table_name}{INDEX_FILE_INFIX}{column}"
+
+
+def _index_key(value) -> bytes:
+    """Кодирует значение столбца в ключ индекса (1 и "1" различаются)."""
+
+    return json.dumps(value, ensure_ascii=JSON_ENSURE_ASCII).encode(ENCODING)
+
+
+def _index_columns(table_name: str) -> set:
+    """Возвращает столбцы, для которых у таблицы есть индексы."""
+
+    prefix = f"{table_name}{INDEX_FILE_INFIX}"
+    columns = {column for table, column in _open_indexes if table == table_name}
+
+    try:
+        filenames = os.listdir(DATA_DIRECTORY)
+    except FileNotFoundError:
+        return columns
+
+    for filename in filenames:
+        if filename.startswith(prefix):
+            # dbm.dumb добавляет к имени расширения .dat/.dir/.bak
+            column = filename[len(prefix):]
+            stem, _, suffix = column.rpartition(".")
+            columns.add(stem if suffix in ("dat", "dir", "bak", "db") else column)
+    return columns
+
+
+def _get_index(table_name: str, column: str):
+    """Открывает (и при необходимости строит) индекс столбца."""
+
+    key = (table_name, column)
+    index = _open_indexes.get(key)
+    if index is not None:
+        return index
+
+    import dbm
+
+    if not _open_indexes:
+        import atexit
+
+        atexit.register(close_indexes)
+
+    path = str(_index_path(table_name, column))
+    Path(DATA_DIRECTORY).mkdir(exist_ok=True)
+    index = dbm.open(path, 'c')
+
+    if INDEX_COMPLETE_KEY in index:
+        # Пока индекс открыт, он считается незавершенным
+        del index[INDEX_COMPLETE_KEY]
+        if hasattr(index, "sync"):
+            index.sync()
+    else:
+        index.close()
+        index = dbm.open(path, 'n')
+        for record in iter_table_records(table_name):
+            value = record.get(column)
+            if value is not None:
+                index[_index_key(value)] = str(record[ID_COLUMN])
+
+    _open_indexes[key] = index
+    return index
+
+
+def close_indexes(table_name: str = None) -> None:
+    """Закрывает открытые индексы (всех таблиц или одной), отмечая их полными."""
+
+    for key in list(_open_indexes):
+        if table_name is None or key[0] == table_name:
+            index = _open_indexes.pop(key)
+            index[INDEX_COMPLETE_KEY] = b"1"
+            index.close()
+
+
+def drop_indexes(table_name: str) -> None:
+    """Удаляет индексы таблицы (они строятся заново при следующем обращении)."""
+
+    for key in list(_open_indexes):
+        if key[0] == table_name:
+            _open_indexes.pop(key).close()
+
+    prefix = f"{table_name}{INDEX_FILE_INFIX}"
+    try:
+        filenames = os.listdir(DATA_DIRECTORY)
+    except FileNotFoundError:
+        return
+    for filename in filenames:
+        if filename.startswith(prefix):
+            (Path(DATA_DIRECTORY) / filename).unlink(missing_ok=True)
+
+
+def index_lookup(table_name: str, column: str, value):
+    """Возвращает ID записи с таким значением столбца или None (через индекс)."""
+
+    record_id = _get_index(table_name, column).get(_index_key(value))
+    return None if record_id is None else int(record_id)
+
+
+def _index_record(table_name: str, record) -> None:
+    """Добавляет запись во все индексы таблицы."""
+
+    for column in _index_columns(table_name):
+        value = record.get(column)
+        if value is not None:
+            _get_index(table_name, column)[_index_key(value)] = \
+                str(record[ID_COLUMN])
+
+
+def _index_diff(columns, old_records, new_records) -> tuple:
+    """
+    Сравнивает значения индексируемых столбцов у прежних и новых записей.
+
+    Returns:
+        (удаляемые, добавляемые) - списки троек (столбец, ключ, ID)
+    """
+
+    removed, added = [], []
+    for column in columns:
+        old = {_index_key(record[column]): str(record[ID_COLUMN])
+               for record in old_records if record.get(column) is not None}
+        new = {_index_key(record[column]): str(record[ID_COLUMN])
+               for record in new_records if record.get(column) is not None}
+        removed += [(column, key, record_id) for key, record_id in old.items()
+                    if new.get(key) != record_id]
+        added += [(column, key, record_id) for key, record_id in new.items()
+                  if old.get(key) != record_id]
+    return removed, added
+
+
+def _apply_index_diff(table_name: str, removed: list, added: list) -> None:
+    """
+    Вносит изменения в индексы таблицы. Ключ удаляется, только если
+    он еще указывает на прежний ID: значение, перешедшее к другой записи,
+    не теряется.
+    """
+
+    for column, key, record_id in removed:
+        index = _get_index(table_name, column)
+        if index.get(key) == record_id.encode(ENCODING):
+            del index[key]
+    for column, key, record_id in added:
+        _get_index(table_name, column)[key] = record_id
+
+
+def verify_index(table_name: str, column: str, expected: dict,
+                 allow_stale: bool = False) -> list:
+    """
+    Сверяет индекс столбца с данными таблицы.
+
+    Args:
+        expected: {значение: ID} по данным таблицы
+        allow_stale: лишние ключи не считаются расхождением (у таблиц
+            с ttl остаются ключи записей из удаленных очисткой сегментов)
+
+    Returns:
+        Список расхождений (пустой, если индекса нет или он верен)
+    """
+
+    if column not in _index_columns(table_name):
+        return []
+
+    index = _get_index(table_name, column)
+    problems = []
+    for value, record_id in expected.items():
+        indexed_id = index.get(_index_key(value))
+        if indexed_id is None or int(indexed_id) != record_id:
+            problems.append(f'Индекс "{column}": значение {value!r} '
+                            f'не указывает на запись ID={record_id}')
+
+    extra = 0 if allow_stale else len(index.keys()) - len(expected)
+    if extra > 0:
+        problems.append(f'Индекс "{column}": лишних значений: {extra}')
+    return problems
+
+
+# === ОБЩИЙ ИНТЕРФЕЙС ===
+
+def table_storage_format(table_name: str):
+    """Возвращает текущий формат хранения таблицы или None."""
+
+    manifest = _load_manifest(table_name)
+    if manifest is not None:
+        return manifest["format"]
+    return find_table_file(table_name)[1]
+
+
+def read_table(table_name: str, condition: dict = None) -> list:
+    """
+    Читает записи таблицы.
+
+    Если передано условие, сегменты, которые по зональным картам
+    не могут содержать подходящих записей, пропускаются. Остальные записи
+    возвращаются без фильтрации.
+    """
+
+    manifest, pin = _pin_snapshot(table_name)
+    if manifest is None:
+        filepath, storage_format = find_table_file(table_name)
+        if filepath is None:
+            return []
+        return _read_table_file(filepath, storage_format)
+
+    try:
+        records = []
+        for segment in manifest["segments"]:
+            if condition and not zone_may_match(segment["zone"], condition):
+                continue
+            records.extend(_read_segment(table_name, manifest, segment))
+        return records
+    finally:
+        pin.unlink(missing_ok=True)
+
+
+def iter_table_records(table_name: str, condition: dict = None,
+                       reverse: bool = False):
+    """
+    Потоково читает записи таблицы по сегментам, в порядке хранения
+    или в обратном (reverse).
+
+    Как и в read_table, сегменты, не подходящие под условие по зональным
+    картам, пропускаются, а остальные записи не фильтруются. В памяти
+    одновременно находится не больше одного сегмента.
+
+    Версия таблицы закрепляется при начале чтения: записи, сделанные
+    во время чтения, не видны, а сегменты снимка не удаляются до его конца.
+    """
+
+    manifest, pin = _pin_snapshot(table_name)
+    if manifest is None:
+        records = read_table(table_name)
+        yield from reversed(records) if reverse else records
+        return
+
+    try:
+        segments = manifest["segments"]
+        for segment in reversed(segments) if reverse else segments:
+            if condition and not zone_may_match(segment["zone"], condition):
+                continue
+            if reverse:
+                yield from reversed(list(_read_segment(table_name, manifest,
+                                                       segment)))
+            else:
+                yield from _read_segment(table_name, manifest, segment)
+    finally:
+        pin.unlink(missing_ok=True)
+
+
+def _scan_segment(filepath: str, storage_format: str, rows: int,
+                  compiled: tuple, id_position) -> list:
+    """
+    Выполняется в процессе пула: сам читает файл сегмента и возвращает
+    значения подходящих строк или, если передана позиция ID, только их ID.
+    """
+
+    matches = []
+    with _open_table_file(Path(filepath), storage_format, 'r') as f:
+        f.readline()
+        for line in islice(f, rows):
+            if not line.strip():
+                continue
+            values = json.loads(line)
+            if row_matches(values, compiled):
+                matches.append(values if id_position is None
+                               else values[id_position])
+    return matches
+
+
+def _scans_in_parallel(segments: list) -> bool:
+    """
+    Проверяет, что сегменты стоит сканировать (по условию) в пуле процессов:
+    их несколько и в них не меньше PARALLEL_SCAN_THRESHOLD строк.
+    """
+
+    return (len(segments) > 1 and scan_workers() > 1
+            and sum(segment["rows"] for segment in segments)
+            >= PARALLEL_SCAN_THRESHOLD)
+
+
+def scans_in_parallel(table_name: str) -> bool:
+    """
+    Проверяет по манифесту, без чтения данных, что таблица сканируется
+    в пуле процессов (однофайловые таблицы сканируются в текущем).
+    """
+
+    manifest = _load_manifest(table_name)
+    return manifest is not None and _scans_in_parallel(manifest["segments"])
+
+
+def _parallel_scan(table_name: str, manifest: dict, segments: list,
+                   condition: dict, ids_only: bool = False):
+    """
+    Сканирует сегменты в пуле процессов: каждому процессу передается путь
+    к файлу сегмента, а обратно возвращаются только подходящие строки
+    (или их ID). Выдает пары (сегмент, совпадения) в порядке segments;
+    в работе одновременно не больше двух сегментов на процесс.
+    """
+
+    columns = manifest["columns"]
+    compiled = compile_condition(columns, condition)
+    id_position = columns.index(ID_COLUMN) if ids_only else None
+    executor = scan_executor()
+    window = 2 * scan_workers()
+    pending = deque()
+
+    try:
+        for segment in segments:
+            pending.append((segment, executor.submit(
+                _scan_segment, str(_segment_path(table_name, segment)),
+                manifest["format"], segment["rows"], compiled, id_position)))
+            if len(pending) >= window:
+                segment, future = pending.popleft()
+                yield segment, future.result()
+
+        while pending:
+            segment, future = pending.popleft()
+            yield segment, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def scan_table(table_name: str, condition: dict = None, reverse: bool = False):
+    """
+    Потоково возвращает записи таблицы, удовлетворяющие условию, в порядке
+    хранения или в обратном (reverse).
+
+    Сегменты, не подходящие под условие по зональным картам, не читаются.
+    Большие таблицы (см. _scans_in_parallel) сканируются в пуле процессов:
+    процессы сами читают и фильтруют файлы сегментов, в текущий процесс
+    передаются только подходящие строки. Версия таблицы закрепляется,
+    как в iter_table_records.
+    """
+
+    manifest, pin = _pin_snapshot(table_name)
+    if manifest is None:
+        records = read_table(table_name)
+        if reverse:
+            records.reverse()
+        yield from filter_records(records, condition) if condition else records
+        return
+
+    try:
+        segments = [segment for segment in manifest["segments"]
+                    if not condition or zone_may_match(segment["zone"], condition)]
+        if reverse:
+            segments.reverse()
+
+        if not condition or not _scans_in_parallel(segments):
+            for segment in segments:
+                records = _read_segment(table_name, manifest, segment)
+                if reverse:
+                    records = reversed(list(records))
+                yield from filter_records(records, condition) if condition \
+                    else records
+            return
+
+        record_class = get_record_class(manifest["columns"])
+        for _, rows in _parallel_scan(table_name, manifest, segments, condition):
+            for values in reversed(rows) if reverse else rows:
+                yield record_class(*values)
+    finally:
+        pin.unlink(missing_ok=True)
+
+
+@contextmanager
+def snapshot_table(table_name: str):
+    """
+    Закрепляет текущую версию таблицы на время работы с ее файлами
+    (например, резервного копирования).
+
+    Yields:
+        (манифест или None для однофайловой таблицы, список путей к файлам
+        данных этой версии)
+    """
+
+    manifest, pin = _pin_snapshot(table_name)
+    if manifest is None:
+        filepath, _ = find_table_file(table_name)
+        yield None, [filepath] if filepath else []
+        return
+
+    try:
+        yield manifest, [_segment_path(table_name, segment)
+                         for segment in manifest["segments"]]
+    finally:
+        pin.unlink(missing_ok=True)
+
+
+def table_sorted_by(table_name: str):
+    """
+    Возвращает столбец, по которому записи таблицы хранятся упорядоченными
+    (сейчас только ID), или None.
+    """
+
+    manifest = _load_manifest(table_name)
+    if manifest is not None:
+        return manifest.get("sorted_by")
+
+    data = read_table(table_name)
+    if data and _is_sorted_by_id(data[0].keys(),
+                                 [record.values() for record in data]):
+        return ID_COLUMN
+    return None
+
+
+def write_table(table_name: str, data: list, storage_format: str = None,
+                previous: list = None) -> None:
+    """
+    Записывает таблицу на диск.
+
+    Если формат не указан, сохраняется текущий формат таблицы. При смене
+    формата файлы в прежнем формате удаляются. Если переданы прежние
+    записи таблицы (previous), в индексах меняются только ключи измененных
+    и удаленных записей; иначе индексы удаляются и строятся заново
+    при следующем обращении.
+    """
+
+    if previous is None:
+        drop_indexes(table_name)
+        _store_table(table_name, data, storage_format)
+        return
+
+    diff = _index_diff(_index_columns(table_name), previous, data)
+    _store_table(table_name, data, storage_format)
+    _apply_index_diff(table_name, *diff)
+
+
+def _store_table(table_name: str, data: list, storage_format: str = None) -> None:
+    """Записывает таблицу на диск, не затрагивая индексы."""
+
+    storage_format = (storage_format or table_storage_format(table_name)
+                      or DEFAULT_STORAGE_FORMAT)
+    if storage_format not in STORAGE_FORMATS:
+        raise ValueError(f"Неизвестный формат хранения: {storage_format}")
+
+    Path(DATA_DIRECTORY).mkdir(exist_ok=True)
+    old_path, _ = find_table_file(table_name)
+
+    if storage_format == STORAGE_JSON:
+        import shutil
+
+        # Однофайловая таблица не версионируется, поэтому каталог сегментов
+        # нельзя удалить, пока из него читают
+        if _oldest_pinned_version(table_name) is not None:
+            raise ValueError(f'Таблица "{table_name}" сейчас читается, '
+                             f'перевод в формат json невозможен.')
+
+        _write_json_file(table_name, data)
+        shutil.rmtree(_table_dir(table_name), ignore_errors=True)
+        return
+
+    _write_segmented(table_name, data, storage_format)
+    if old_path is not None:
+        old_path.unlink()
+
+
+def delete_table(table_name: str) -> None:
+    """
+    Удаляет файлы таблицы: каталог сегментов (с манифестом и закреплениями),
+    однофайловую таблицу в любом формате и индексы.
+    """
+
+    import shutil
+
+    drop_indexes(table_name)
+    shutil.rmtree(_table_dir(table_name), ignore_errors=True)
+    for storage_format in STORAGE_FORMATS:
+        table_file_path(table_name, storage_format).unlink(missing_ok=True)
+
+
+def _check_record_columns(table_name: str, columns, record) -> None:
+    """Проверяет, что столбцы записи совпадают со столбцами таблицы."""
+
+    if list(record.keys()) != list(columns):
+        raise ValueError(f'Столбцы записи ({", ".join(record.keys())}) '
+                         f'не совпадают со столбцами таблицы "{table_name}" '
+                         f'({", ".join(columns)})')
+
+
+def append_record(table_name: str, record) -> None:
+    """
+    Добавляет запись в конец таблицы.
+
+    В сегментированной таблице затрагивается только последний сегмент,
+    однофайловая таблица переписывается целиком. Запись добавляется
+    в индексы таблицы. Запись с другими столбцами, чем у таблицы,
+    не добавляется (ValueError).
+    """
+
+    manifest = _load_manifest(table_name)
+    if manifest is None:
+        data = read_table(table_name)
+        if data:
+            _check_record_columns(table_name, data[0].keys(), record)
+        data.append(record)
+        _store_table(table_name, data)
+    else:
+        if not manifest["columns"]:
+            manifest["columns"] = list(record.keys())
+        _check_record_columns(table_name, manifest["columns"], record)
+        _append_to_tail(table_name, manifest, record.values())
+
+    _index_record(table_name, record)
+
+
+def next_record_id(table_name: str) -> int:
+    """Возвращает следующий ID (максимальный ID + 1) по зональным картам."""
+
+    manifest = _load_manifest(table_name)
+    if manifest is not None:
+        max_ids = [segment["zone"].get(ID_COLUMN, {}).get("max")
+                   for segment in manifest["segments"]]
+        if None not in max_ids:
+            return max(max_ids, default=0) + 1
+
+    data = read_table(table_name)
+    return max((record.get(ID_COLUMN, 0) for record in data), default=0) + 1
+
+
+def count_records(table_name: str) -> int:
+    """Возвращает число записей таблицы."""
+
+    manifest = _load_manifest(table_name)
+    if manifest is not None:
+        return sum(segment["rows"] for segment in manifest["segments"])
+    return len(read_table(table_name))
+
+
+def _files_raw_size(files) -> int:
+    """Считает размер несжатых данных в списке (путь, формат)."""
+
+    raw_size = 0
+    for filepath, storage_format in files:
+        with _open_table_file(filepath, storage_format, 'r') as f:
+            for line in f:
+                raw_size += len(line.encode(ENCODING))
+    return raw_size
+
+
+def _segment_raw_size(table_name: str, manifest: dict, segment: dict) -> int:
+    """
+    Возвращает размер несжатых данных сегмента из манифеста. Для
+    сегментов, записанных до появления raw_bytes, сжатый файл читается.
+    """
+
+    if "raw_bytes" in segment:
+        return segment["raw_bytes"]
+    if manifest["format"] == STORAGE_COMPACT:
+        return segment["bytes"]
+    return _files_raw_size([(_segment_path(table_name, segment),
+                             manifest["format"])])
+
+
+def table_storage_info(table_name: str) -> dict:
+    """
+    Возвращает формат хранения таблицы, число сегментов, размер файлов
+    на диске и размер несжатых данных.
+
+    Размеры сегментов берутся из манифеста, файлы не читаются.
+    """
+
+    manifest = _load_manifest(table_name)
+    if manifest is not None:
+        segments = manifest["segments"]
+        return {
+            "format": manifest["format"],
+            "segments": len(segments),
+            "file_size": sum(segment["bytes"] for segment in segments),
+            "raw_size": sum(_segment_raw_size(table_name, manifest, segment)
+                            for segment in segments),
+        }
+
+    filepath, storage_format = find_table_file(table_name)
+    file_size = filepath.stat().st_size if filepath else 0
+    if filepath and storage_format not in (STORAGE_JSON, STORAGE_COMPACT):
+        # Сжатый однофайловый формат прежних версий
+        raw_size = _files_raw_size([(filepath, storage_format)])
+    else:
+        raw_size = file_size
+
+    return {
+        "format": storage_format or DEFAULT_STORAGE_FORMAT,
+        "segments": 0,
+        "file_size": file_size,
+        "raw_size": raw_size,
+    }
+
+
+def verify_table(table_name: str, check_record=None) -> tuple:
+    """
+    Проверяет целостность таблицы по закрепленному снимку.
+
+    Для сегментированной таблицы сверяются число строк, контрольные суммы
+    и зональные карты сегментов, отметка упорядоченности по ID, ищутся
+    лишние файлы. Каждая запись передается в check_record, который
+    возвращает описание проблемы или None.
+
+    Returns:
+        (список проблем, число прочитанных записей)
+    """
+
+    manifest, pin = _pin_snapshot(table_name)
+    if manifest is None:
+        try:
+            data = read_table(table_name)
+        except Exception as e:
+            return [f"Файл таблицы не читается ({e})"], 0
+        problems = [check_record(record) for record in data] if check_record else []
+        return [problem for problem in problems if problem], len(data)
+
+    try:
+        problems = []
+        state = {"rows": 0, "last_id": None, "sorted": True}
+        for segment in manifest["segments"]:
+            problems += _verify_segment(table_name, manifest, segment,
+                                        check_record, state)
+
+        if manifest.get("sorted_by") == ID_COLUMN and not state["sorted"]:
+            problems.append("Манифест: таблица отмечена как упорядоченная "
+                            "по ID, но порядок нарушен")
+        problems += [f"Лишний файл: {filepath.name}"
+                     for filepath in _orphan_files(table_name, manifest,
+                                                   manifest["next_segment"])]
+        return problems, state["rows"]
+    finally:
+        pin.unlink(missing_ok=True)
+
+
+def purge_expired(table_name: str, column: str, now: float,
+                  max_segments: int = TTL_SWEEP_BATCH_SEGMENTS) -> int:
+    """
+    Удаляет записи, срок жизни которых (значение column) истек к now.
+
+    Сегменты - это пачки записей по времени вставки: сегмент, в котором
+    по зональной карте истекли все записи, удаляется без чтения, а
+    сегменты с частью истекших записей переписываются (не больше
+    max_segments за вызов). Остальные сегменты не затрагиваются.
+    Однофайловая таблица переписывается целиком.
+
+    Из индексов удаляются ключи прочитанных истекших записей; ключи
+    записей из удаленных без чтения сегментов остаются и считаются
+    свободными (они указывают на несуществующие ID).
+
+    Returns:
+        Число удаленных записей
+    """
+
+    def expired(value) -> bool:
+        return value is not None and value <= now
+
+    manifest = _load_manifest(table_name)
+    if manifest is None:
+        data = read_table(table_name)
+        live = [record for record in data if not expired(record.get(column))]
+        if len(live) < len(data):
+            write_table(table_name, live, previous=data)
+        return len(data) - len(live)
+
+    if column not in manifest["columns"]:
+        return 0
+
+    version = manifest.get("version", 0)
+    segments, retired, written, purged = [], [], [], []
+    removed = rewritten = 0
+
+    for segment in manifest["segments"]:
+        stats = segment["zone"].get(column, {})
+        low, high = stats.get("min"), stats.get("max")
+
+        if (not stats.get("mixed") and not stats.get("nulls")
+                and high is not None and expired(high)):
+            retired.append(segment)
+            removed += segment["rows"]
+            continue
+
+        if (rewritten < max_segments
+                and (stats.get("mixed") or expired(low))):
+            rewritten += 1
+            records = list(_read_segment(table_name, manifest, segment))
+            live = [record.values() for record in records
+                    if not expired(record[column])]
+            if len(live) < len(records):
+                retired.append(segment)
+                removed += len(records) - len(live)
+                purged += [record for record in records
+                           if expired(record[column])]
+                if live:
+                    segment = _write_segment(table_name, manifest, live)
+                    written.append(segment)
+                else:
+                    continue
+
+        segments.append(segment)
+
+    if not retired:
+        return 0
+
+    current = _load_manifest(table_name)
+    if current is None or current.get("version", 0) != version:
+        # Таблицу изменили во время очистки - попробуем в следующий раз
+        _remove_segment_files(table_name, written)
+        return 0
+
+    manifest["segments"] = segments
+    manifest["garbage"] = current.get("garbage", [])
+    _commit_manifest(table_name, manifest, retired)
+    _apply_index_diff(table_name,
+                      *_index_diff(_index_columns(table_name), purged, []))
+    return removed
+
+
+def _replace_version(table_name: str, manifest: dict, pin: Path,
+                     new_manifest: dict, rows, conflict_message: str) -> None:
+    """
+    Пишет строки в новые сегменты new_manifest и сохраняет его как новую
+    версию таблицы вместо закрепленной версии manifest.
+
+    Если чтение строк прервалось исключением или таблицу изменили
+    после закрепления, новые сегменты удаляются, а таблица не меняется.
+    """
+
+    try:
+        _write_rows(table_name, new_manifest, rows)
+    except BaseException:
+        _remove_segment_files(table_name, new_manifest["segments"])
+        raise
+    finally:
+        pin.unlink(missing_ok=True)
+
+    current = _load_manifest(table_name)
+    if current is None or current.get("version", 0) != manifest.get("version", 0):
+        _remove_segment_files(table_name, new_manifest["segments"])
+        raise ValueError(conflict_message)
+
+    new_manifest["version"] = current.get("version", 0)
+    new_manifest["garbage"] = current.get("garbage", [])
+    _commit_manifest(table_name, new_manifest, current["segments"])
+
+
+def _segments_with_matches(table_name: str, manifest: dict,
+                           condition: dict) -> set:
+    """
+    Возвращает имена файлов сегментов, в которых могут быть записи под
+    условием: по зональным картам, а у больших таблиц - по результатам
+    сканирования сегментов в пуле процессов.
+    """
+
+    segments = [segment for segment in manifest["segments"]
+                if not condition or zone_may_match(segment["zone"], condition)]
+    if not condition or not _scans_in_parallel(segments):
+        return {segment["file"] for segment in segments}
+
+    return {segment["file"] for segment, ids
+            in _parallel_scan(table_name, manifest, segments, condition,
+                              ids_only=True)
+            if ids}
+
+
+def _segments_sorted_by_id(segments: list) -> bool:
+    """Проверяет по зональным картам, что ID растут от сегмента к сегменту."""
+
+    bounds = [segment["zone"].get(ID_COLUMN, {}) for segment in segments]
+    return all(prev.get("max") is not None and stats.get("min") is not None
+               and prev["max"] < stats["min"]
+               for prev, stats in zip(bounds, bounds[1:]))
+
+
+def _rewrite_segments(table_name: str, manifest: dict, pin: Path, select,
+                      rewrite, validate=None) -> None:
+    """
+    Переписывает часть сегментов закрепленной версии и сохраняет новую.
+
+    select(manifest) возвращает имена файлов сегментов, которые нужно
+    прочитать; rewrite(segment, records) - новые записи сегмента (его
+    записи, возвращенные без изменений, оставляют сегмент как есть).
+    Остальные сегменты переходят в новую версию без чтения. Перед
+    сохранением вызывается validate (если передан).
+
+    Новая версия манифеста сохраняется атомарно, замененные сегменты
+    удаляются, когда их не читает ни один снимок. Если rewrite или validate
+    прерываются исключением, таблица не меняется. В индексах меняются
+    только ключи измененных и удаленных записей.
+    """
+
+    version = manifest.get("version", 0)
+    segments, retired, written = [], [], []
+    index_columns = _index_columns(table_name)
+    removed_keys, added_keys = [], []
+    sorted_by_id = manifest.get("sorted_by") == ID_COLUMN
+
+    try:
+        selected = select(manifest)
+        for segment in manifest["segments"]:
+            if segment["file"] not in selected:
+                segments.append(segment)
+                continue
+
+            records = list(_read_segment(table_name, manifest, segment))
+            output = rewrite(segment, records)
+            if len(output) == len(records) and all(
+                    new is old for new, old in zip(output, records)):
+                segments.append(segment)
+                continue
+
+            retired.append(segment)
+            removed, added = _index_diff(index_columns, records, output)
+            removed_keys += removed
+            added_keys += added
+            for start in range(0, len(output), SEGMENT_SIZE):
+                rows = [record.values()
+                        for record in output[start:start + SEGMENT_SIZE]]
+                sorted_by_id = sorted_by_id and _is_sorted_by_id(
+                    manifest["columns"], rows)
+                segment = _write_segment(table_name, manifest, rows)
+                written.append(segment)
+                segments.append(segment)
+
+        if validate is not None:
+            validate()
+    except BaseException:
+        _remove_segment_files(table_name, written)
+        raise
+    finally:
+        pin.unlink(missing_ok=True)
+
+    if not retired:
+        return
+
+    current = _load_manifest(table_name)
+    if current is None or current.get("version", 0) != version:
+        _remove_segment_files(table_name, written)
+        raise ValueError("Таблица изменилась во время изменения, "
+                         "повторите команду.")
+
+    manifest["segments"] = segments
+    manifest["sorted_by"] = ID_COLUMN if sorted_by_id and \
+        _segments_sorted_by_id(segments) else None
+    manifest["garbage"] = current.get("garbage", [])
+    _commit_manifest(table_name, manifest, retired)
+    _apply_index_diff(table_name, removed_keys, added_keys)
+
+
+def _rewrite_single_file(table_name: str, transform, validate=None) -> None:
+    """
+    Потоково переписывает однофайловую таблицу в сегменты формата compact.
+
+    Файл читается один раз, а записи после transform сразу пишутся
+    в сегменты: вторая копия таблицы в памяти не собирается. В индексах
+    меняются только ключи измененных и удаленных записей. Если transform
+    или validate прервались исключением, таблица остается в прежнем файле.
+    """
+
+    import shutil
+
+    filepath, storage_format = find_table_file(table_name)
+    previous = [] if filepath is None else \
+        _read_table_file(filepath, storage_format)
+    columns = previous[0].keys() if previous else []
+    index_columns = _index_columns(table_name)
+    indexed = []
+
+    def rows():
+        for record in transform(iter(previous)):
+            if index_columns:
+                indexed.append({column: record.get(column)
+                                for column in (ID_COLUMN, *index_columns)})
+            yield record.values()
+
+    manifest = _new_manifest(STORAGE_COMPACT, columns)
+    _table_dir(table_name).mkdir(parents=True, exist_ok=True)
+    try:
+        _write_rows(table_name, manifest, rows())
+        if validate is not None:
+            validate()
+    except BaseException:
+        shutil.rmtree(_table_dir(table_name), ignore_errors=True)
+        raise
+
+    diff = _index_diff(index_columns, previous, indexed)
+    _commit_manifest(table_name, manifest, ())
+    if filepath is not None:
+        filepath.unlink()
+    _apply_index_diff(table_name, *diff)
+
+
+def rewrite_table(table_name: str, transform, condition: dict = None,
+                  validate=None) -> None:
+    """
+    Потоково изменяет таблицу без загрузки в память.
+
+    Переписываются только сегменты, в которых есть записи под условием
+    condition (см. _segments_with_matches): записи такого сегмента проходят
+    через transform (генератор, получающий и возвращающий записи; общее
+    для всех сегментов состояние он хранит сам). Сегмент, который transform
+    не изменил, и сегменты без подходящих записей остаются в новой версии
+    как есть (см. _rewrite_segments). Однофайловая таблица (json)
+    переводится в сегменты (см. _rewrite_single_file).
+    """
+
+    manifest, pin = _pin_snapshot(table_name)
+    if manifest is None:
+        _rewrite_single_file(table_name, transform, validate)
+        return
+
+    _rewrite_segments(
+        table_name, manifest, pin,
+        lambda manifest: _segments_with_matches(table_name, manifest, condition),
+        lambda segment, records: list(transform(iter(records))),
+        validate)
+
+
+def _assign_by_id(manifest: dict, ids: list, added: list) -> dict:
+    """
+    Распределяет изменения по сегментам по зональным картам ID.
+
+    В таблице, упорядоченной по ID, ID относится к первому сегменту,
+    максимальный ID которого не меньше его (ID правее всех сегментов -
+    к последнему). Иначе удаляемый ID относится к сегментам, в диапазон
+    которых он попадает, а новые записи дописываются в последний сегмент.
+
+    Returns:
+        {файл сегмента: (ID, новые записи)}
+    """
+
+    segments = manifest["segments"]
+    assigned = {segment["file"]: ([], []) for segment in segments}
+    last = segments[-1]["file"]
+
+    if manifest.get("sorted_by") == ID_COLUMN:
+        highs = [segment["zone"][ID_COLUMN]["max"] for segment in segments]
+        for record_id in ids:
+            position = min(bisect_left(highs, record_id), len(segments) - 1)
+            assigned[segments[position]["file"]][0].append(record_id)
+        for record in added:
+            position = min(bisect_left(highs, record[ID_COLUMN]),
+                           len(segments) - 1)
+            assigned[segments[position]["file"]][1].append(record)
+    else:
+        for segment in segments:
+            stats = segment["zone"].get(ID_COLUMN, {})
+            if stats.get("min") is None:
+                assigned[segment["file"]][0].extend(ids)
+                continue
+            assigned[segment["file"]][0].extend(
+                ids[bisect_left(ids, stats["min"]):bisect_right(ids, stats["max"])])
+        assigned[last][1].extend(added)
+
+    return {file: change for file, change in assigned.items()
+            if change[0] or change[1]}
+
+
+def merge_by_id(table_name: str, changes: dict) -> None:
+    """
+    Применяет к таблице изменения {ID: новая запись или None}: записи
+    с этими ID удаляются, а новые записи вставляются на место по порядку ID.
+
+    Переписываются только сегменты, в диапазон ID которых по зональным
+    картам попадают изменения (см. _assign_by_id и _rewrite_segments),
+    по одному за раз. Однофайловая таблица переписывается целиком.
+    """
+
+    def by_id(record):
+        return record[ID_COLUMN]
+
+    ids = sorted(changes)
+    added = sorted((record for record in changes.values() if record is not None),
+                   key=by_id)
+
+    manifest, pin = _pin_snapshot(table_name)
+    if manifest is None or not manifest["segments"]:
+        if pin is not None:
+            pin.unlink(missing_ok=True)
+        previous = read_table(table_name)
+        kept = [record for record in previous if record[ID_COLUMN] not in changes]
+        if added or len(kept) < len(previous):
+            write_table(table_name, list(merge(kept, added, key=by_id)),
+                        previous=previous)
+        return
+
+    assigned = {}
+
+    def select(manifest):
+        assigned.update(_assign_by_id(manifest, ids, added))
+        return set(assigned)
+
+    def rewrite(segment, records):
+        removed_ids, new_records = assigned[segment["file"]]
+        removed_ids = set(removed_ids)
+        kept = [record for record in records
+                if record[ID_COLUMN] not in removed_ids]
+        if not new_records:
+            return kept if len(kept) < len(records) else records
+        return list(merge(kept, new_records, key=by_id))
+
+    _rewrite_segments(table_name, manifest, pin, select, rewrite)
+
+
+def estimate_table_memory(table_name: str) -> int:
+    """
+    Оценивает объем памяти (байт), нужный для загрузки таблицы списком
+    записей.
+
+    Для сегментированной таблицы размер первой записи со значениями
+    умножается на число записей из манифеста. Однофайловая таблица
+    не читается: объем оценивается по размеру файла (JSON_MEMORY_RATIO).
+    """
+
+    manifest = _load_manifest(table_name)
+    if manifest is None:
+        filepath, _ = find_table_file(table_name)
+        return 0 if filepath is None else \
+            filepath.stat().st_size * JSON_MEMORY_RATIO
+
+    records = iter_table_records(table_name)
+    try:
+        first = next(records, None)
+    finally:
+        records.close()
+
+    if first is None:
+        return 0
+
+    record_size = sys.getsizeof(first) + sum(sys.getsizeof(value)
+                                             for value in first.values())
+    return record_size * sum(segment["rows"] for segment in manifest["segments"])
+
+
+def _rebuild_indexes(table_name: str) -> None:
+    """Строит заново все существующие индексы таблицы."""
+
+    columns = _index_columns(table_name)
+    drop_indexes(table_name)
+    for column in columns:
+        _get_index(table_name, column)
+
+
+def vacuum_table(table_name: str, progress=None,
+                 io_limit: int = VACUUM_IO_LIMIT) -> dict:
+    """
+    Переписывает таблицу компактно: записи укладываются в полные сегменты,
+    зональные карты, контрольные суммы, отметка упорядоченности и индексы
+    строятся заново, лишние файлы удаляются.
+
+    Чтение идет по снимку и ограничено io_limit байт/с, поэтому таблицу
+    можно обслуживать под нагрузкой: читатели не блокируются, а если
+    таблицу изменили во время vacuum, результат отбрасывается.
+
+    Args:
+        progress: Функция progress(обработано сегментов, всего сегментов)
+
+    Returns:
+        Сведения: rows, segments_before, segments_after, bytes_before,
+        bytes_after, removed_files
+    """
+
+    manifest, pin = _pin_snapshot(table_name)
+    if manifest is None:
+        filepath, _ = find_table_file(table_name)
+        size = filepath.stat().st_size if filepath else 0
+        data = read_table(table_name)
+        _store_table(table_name, data)
+        _rebuild_indexes(table_name)
+        filepath, _ = find_table_file(table_name)
+        return {
+            "rows": len(data), "segments_before": 0, "segments_after": 0,
+            "bytes_before": size,
+            "bytes_after": filepath.stat().st_size if filepath else 0,
+            "removed_files": 0,
+        }
+
+    segments = manifest["segments"]
+    new_manifest = _new_manifest(manifest["format"], manifest["columns"])
+    new_manifest["next_segment"] = manifest["next_segment"]
+
+    def read_rows():
+        started = time.monotonic()
+        processed = 0
+        for number, segment in enumerate(segments, 1):
+            for record in _read_segment(table_name, manifest, segment):
+                yield record.values()
+            processed += segment["bytes"]
+            _throttle(started, processed, io_limit)
+            if progress:
+                progress(number, len(segments))
+
+    _replace_version(table_name, manifest, pin, new_manifest, read_rows(),
+                     "Таблица изменилась во время vacuum, повторите команду.")
+
+    orphans = _orphan_files(table_name, new_manifest, manifest["next_segment"])
+    for filepath in orphans:
+        filepath.unlink(missing_ok=True)
+    _rebuild_indexes(table_name)
+
+    return {
+        "rows": sum(segment["rows"] for segment in new_manifest["segments"]),
+        "segments_before": len(segments),
+        "segments_after": len(new_manifest["segments"]),
+        "bytes_before": sum(segment["bytes"] for segment in segments),
+        "bytes_after": sum(segment["bytes"]
+                           for segment in new_manifest["segments"]),
+        "removed_files": len(orphans),
+    }
@@ -0,0 +1,99 @@
+import time
+from contextlib import contextmanager
+
+from .command_log import log_event
+from .constants import DEFAULT_METADATA_FILE, TTL_SWEEP_INTERVAL
+from .core import expiry_column
+from .utils import load_metadata, lock_table_data, purge_expired_records
+
+_lock = None
+_thread = None
+_stopping = False
+
+
+def sweep_expired(metadata_file: str = DEFAULT_METADATA_FILE) -> dict:
+    """
+    Удаляет истекшие записи всех таблиц со столбцом срока жизни.
+
+    Returns:
+        {таблица: число удаленных записей} для таблиц, где что-то удалено
+    """
+
+    metadata = load_metadata(metadata_file)
+    now = time.time()
+    purged = {}
+
+    for table_name in metadata:
+        column = expiry_column(metadata, table_name)
+        if column is None:
+            continue
+
+        try:
+            with lock_table_data(table_name):
+                removed = purge_expired_records(table_name, column, now)
+        except (OSError, ValueError) as e:
+            log_event({"event": "ttl_sweep", "table": table_name,
+                       "error": str(e)})
+            continue
+
+        if removed:
+            purged[table_name] = removed
+            log_event({"event": "ttl_sweep", "table": table_name,
+                       "purged": removed})
+
+    return purged
+
+
+def _sweeper_loop() -> None:
+    """Фоновый поток: раз в TTL_SWEEP_INTERVAL секунд удаляет истекшие записи."""
+
+    while True:
+        time.sleep(TTL_SWEEP_INTERVAL)
+        with _lock:
+            if _stopping:
+                return
+            sweep_expired()
+
+
+def start_sweeper(metadata: dict) -> None:
+    """
+    Лениво запускает фоновый поток очистки, если в базе есть таблицы
+    со столбцом срока жизни (threading импортируется только здесь).
+    """
+
+    global _lock, _thread
+
+    if _thread is not None:
+        return
+    if not any(expiry_column(metadata, table_name) for table_name in metadata):
+        return
+
+    import atexit
+    import threading
+
+    _lock = threading.Lock()
+    _thread = threading.Thread(target=_sweeper_loop, name="ttl-sweeper",
+                               daemon=True)
+    _thread.start()
+    atexit.register(_stop)
+
+
+@contextmanager
+def sweeper_paused():
+    """Не дает фоновой очистке менять таблицы, пока выполняется команда."""
+
+    if _lock is None:
+        yield
+        return
+
+    with _lock:
+        yield
+
+
+def _stop() -> None:
+    """Дожидается текущего прохода очистки и запрещает следующие (при выходе)."""
+
+    global _stopping
+
+    with _lock:
+        _stopping = True
@@ -1,13 +1,35 @@
 import json
-from pathlib import Path
 
+from .backup import backup_database, restore_database
 from .constants import (
-    DATA_DIRECTORY,
     DEFAULT_METADATA_FILE,
+    DEFAULT_VIEWS_FILE,
     ENCODING,
     JSON_ENSURE_ASCII,
     JSON_INDENT,
-    TABLE_FILE_EXTENSION,
+)
+from .storage import (
+    append_record,
+    count_records,
+    delete_table,
+    drop_indexes,
+    estimate_table_memory,
+    index_lookup,
+    iter_table_records,
+    lock_table,
+    merge_by_id,
+    next_record_id,
+    purge_expired,
+    read_table,
+    rewrite_table,
+    scan_table,
+    scans_in_parallel,
+    table_sorted_by,
+    table_storage_info,
+    vacuum_table,
+    verify_index,
+    verify_table,
+    write_table,
 )
 
 
@@ -26,23 +48,157 @@ def save_metadata(data: dict, filepath: str = DEFAULT_METADATA_FILE) -> None:
     with open(filepath, 'w', encoding=ENCODING) as f:
         json.dump(data, f, ensure_ascii=JSON_ENSURE_ASCII, indent=JSON_INDENT)
 
-def load_table_data(table_name: str) -> list:
-    """Загружает данные таблицы из файла."""
+def load_views(filepath: str = DEFAULT_VIEWS_FILE) -> dict:
+    """Загружает определения материализованных представлений."""
 
-    filepath = Path(DATA_DIRECTORY) / f"{table_name}{TABLE_FILE_EXTENSION}"
+    return load_metadata(filepath)
 
-    try:
-        with open(filepath, 'r', encoding=ENCODING) as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+def save_views(views: dict, filepath: str = DEFAULT_VIEWS_FILE) -> None:
+    """Сохраняет определения материализованных представлений."""
 
-def save_table_data(table_name: str, data: list) -> None:
-    """Сохраняет данные таблицы в файл."""
+    save_metadata(views, filepath)
 
-    Path(DATA_DIRECTORY).mkdir(exist_ok=True)
-    
-    filepath = Path(DATA_DIRECTORY) / f"{table_name}{TABLE_FILE_EXTENSION}"
-    
-    with open(filepath, 'w', encoding=ENCODING) as f:
-        json.dump(data, f, ensure_ascii=JSON_ENSURE_ASCII, indent=JSON_INDENT)
\ No newline at end of file
+def lock_table_data(table_name: str):
+    """
+    Возвращает контекстный менеджер блокировки таблицы от изменения
+    другими процессами (на время команды).
+    """
+
+    return lock_table(table_name)
+
+def load_table_data(table_name: str, where_clause: dict = None) -> list:
+    """
+    Загружает данные таблицы из файла.
+
+    Записи возвращаются как компактные объекты Record (см. records.py),
+    а не как словари. Формат и сжатие файла определяются автоматически.
+    Если передано условие WHERE, сегменты, в которых по зональным картам
+    нет подходящих записей, не читаются (остальные записи не фильтруются).
+    """
+
+    return read_table(table_name, where_clause)
+
+def iter_table_data(table_name: str, where_clause: dict = None,
+                    reverse: bool = False):
+    """
+    Потоково читает записи таблицы по сегментам (в порядке хранения
+    или в обратном), не загружая таблицу целиком.
+    """
+
+    return iter_table_records(table_name, where_clause, reverse)
+
+def scan_table_data(table_name: str, where_clause: dict = None,
+                    reverse: bool = False):
+    """
+    Потоково возвращает записи таблицы, удовлетворяющие условию WHERE
+    (большие таблицы сканируются по сегментам в пуле процессов).
+    """
+
+    return scan_table(table_name, where_clause, reverse)
+
+def get_table_sort_column(table_name: str):
+    """Возвращает столбец, по которому таблица хранится упорядоченной, или None."""
+
+    return table_sorted_by(table_name)
+
+def save_table_data(table_name: str, data: list, storage_format: str = None,
+                    previous: list = None) -> None:
+    """
+    Сохраняет данные таблицы в файл (в текущем или указанном формате).
+    По прежним данным (previous) индексы обновляются, а не строятся заново.
+    """
+
+    write_table(table_name, data, storage_format, previous)
+
+def delete_table_data(table_name: str) -> None:
+    """Удаляет файлы данных и индексы таблицы."""
+
+    delete_table(table_name)
+
+def rewrite_table_data(table_name: str, transform, where_clause: dict = None,
+                       validate=None) -> None:
+    """
+    Потоково переписывает через transform (генератор записей) сегменты
+    таблицы, в которых есть записи под условием WHERE.
+    """
+
+    rewrite_table(table_name, transform, where_clause, validate)
+
+def merge_table_data(table_name: str, changes: dict) -> None:
+    """
+    Применяет изменения {ID: запись или None} к таблице, упорядоченной
+    по ID, переписывая только затронутые сегменты.
+    """
+
+    merge_by_id(table_name, changes)
+
+def table_scans_in_parallel(table_name: str) -> bool:
+    """Проверяет по манифесту, что таблица сканируется в пуле процессов."""
+
+    return scans_in_parallel(table_name)
+
+def get_table_memory_estimate(table_name: str) -> int:
+    """Оценивает объем памяти для загрузки таблицы целиком (байт)."""
+
+    return estimate_table_memory(table_name)
+
+def append_table_record(table_name: str, record) -> None:
+    """Добавляет запись в конец таблицы (только в последний сегмент)."""
+
+    append_record(table_name, record)
+
+def find_by_unique_value(table_name: str, column: str, value):
+    """Возвращает ID записи с таким значением уникального столбца или None."""
+
+    return index_lookup(table_name, column, value)
+
+def drop_table_indexes(table_name: str) -> None:
+    """Удаляет индексы таблицы (они строятся заново при следующем обращении)."""
+
+    drop_indexes(table_name)
+
+def verify_table_index(table_name: str, column: str, expected: dict,
+                       allow_stale: bool = False) -> list:
+    """Сверяет индекс уникального столбца с данными таблицы."""
+
+    return verify_index(table_name, column, expected, allow_stale)
+
+def purge_expired_records(table_name: str, column: str, now: float) -> int:
+    """Удаляет записи с истекшим сроком жизни (пачками по сегментам)."""
+
+    return purge_expired(table_name, column, now)
+
+def get_next_table_id(table_name: str) -> int:
+    """Возвращает следующий свободный ID таблицы."""
+
+    return next_record_id(table_name)
+
+def count_table_records(table_name: str) -> int:
+    """Возвращает число записей в таблице."""
+
+    return count_records(table_name)
+
+def get_table_storage_info(table_name: str) -> dict:
+    """Возвращает сведения о формате хранения и сжатии таблицы."""
+
+    return table_storage_info(table_name)
+
+def verify_table_data(table_name: str, check_record=None) -> tuple:
+    """Проверяет целостность файлов таблицы и каждую запись (check_record)."""
+
+    return verify_table(table_name, check_record)
+
+def vacuum_table_data(table_name: str, progress=None) -> dict:
+    """Переписывает таблицу компактно с перестроением служебных данных."""
+
+    return vacuum_table(table_name, progress)
+
+def create_backup(target_dir: str) -> dict:
+    """Создает инкрементальную резервную копию базы в каталоге."""
+
+    return backup_database(target_dir)
+
+def restore_backup(source_dir: str, timestamp: str = None) -> dict:
+    """Восстанавливает базу из резервной копии (последней или на момент времени)."""
+
+    return restore_database(source_dir, timestamp)
@@ -0,0 +1,68 @@
+from .constants import ID_COLUMN
+from .parser import Condition
+from .scan import filter_records
+from .utils import append_table_record, merge_table_data
+
+
+def view_definition(table_name: str, where_clause: dict = None) -> dict:
+    """Строит сериализуемое определение представления (для db_views.json)."""
+
+    where = [[column, condition.operator, condition.value]
+             for column, condition in (where_clause or {}).items()]
+    return {"table": table_name, "where": where}
+
+
+def view_condition(definition: dict) -> dict:
+    """Восстанавливает условие WHERE представления из определения."""
+
+    return {column: Condition(operator, value)
+            for column, operator, value in definition["where"]}
+
+
+def views_of(views: dict, table_name: str) -> list:
+    """Возвращает имена представлений, построенных по таблице."""
+
+    return [view_name for view_name, definition in views.items()
+            if definition["table"] == table_name]
+
+
+def _matching(definition: dict, records) -> list:
+    """Оставляет записи, подходящие под условие представления."""
+
+    return list(filter_records(records, view_condition(definition)))
+
+
+def apply_insert(views: dict, table_name: str, record) -> None:
+    """
+    Дописывает новую запись базовой таблицы в ее представления, если она
+    подходит под их условия (только в последний сегмент, без пересчета).
+    """
+
+    for view_name in views_of(views, table_name):
+        if _matching(views[view_name], [record]):
+            append_table_record(view_name, record)
+
+
+def apply_changes(views: dict, table_name: str, changes: dict) -> None:
+    """
+    Применяет к представлениям изменения базовой таблицы.
+
+    Args:
+        changes: {ID: новая запись или None для удаленной}
+
+    Представление не пересчитывается по базовой таблице: из него удаляются
+    записи с измененными ID, а новые версии записей, подходящие под
+    условие, вставляются на место по порядку ID. Переписываются только
+    сегменты представления, в диапазон ID которых попадают изменения.
+    """
+
+    if not changes:
+        return
+
+    updated = [record for record in changes.values() if record is not None]
+
+    for view_name in views_of(views, table_name):
+        view_changes = dict.fromkeys(changes)
+        view_changes.update((record[ID_COLUMN], record)
+                            for record in _matching(views[view_name], updated))
+        merge_table_data(view_name, view_changes)